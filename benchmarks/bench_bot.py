@@ -0,0 +1,184 @@
+import gc
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASELINES_DIR = BENCH_DIR / "baselines"
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from fake_gateway import FakeGateway
+from module_state import ModuleState, ModuleMetadata
+
+REGISTERED_TEMPLATE = '''async def {command}(message):
+    return "{command} " + " ".join(message.content.split()[1:])
+
+bc_commands = {{"{command}": {command}}}
+'''
+LEGACY_TEMPLATE = '''async def execute_command(command, message):
+    if command == "{command}":
+        return "{command} " + " ".join(message.content.split()[1:])
+    return None
+'''
+HIGHER_IS_WORSE = ("p50_ms", "p99_ms", "max_ms", "memory_growth_kb")
+LOWER_IS_WORSE = ("messages_per_second",)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Replay a message stream through bot.on_message offline.")
+    parser.add_argument("--modules", type=int, default=50, help="number of synthetic modules")
+    parser.add_argument("--legacy-ratio", type=float, default=0.2, help="share of modules without declared commands")
+    parser.add_argument("--messages", type=int, default=20000, help="number of synthetic messages")
+    parser.add_argument("--rate", type=float, default=0, help="messages per second, 0 replays as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=64, help="messages in flight when replaying as fast as possible")
+    parser.add_argument("--replay", help="JSONL file of recorded messages ({\"content\", \"author\", \"channel\"})")
+    parser.add_argument("--send-delay", type=float, default=0.0, help="simulated channel.send latency in seconds")
+    parser.add_argument("--keep-limits", action="store_true", help="keep throttling and send rate limits from settings")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc memory tracking")
+    parser.add_argument("--save-baseline", metavar="NAME", help="save the report to benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare with benchmarks/baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression when comparing")
+    return parser.parse_args(argv)
+
+
+def write_modules(directory, count, legacy_ratio):
+    commands = []
+    enabled = {}
+    legacy_count = int(count * legacy_ratio)
+    for index in range(count):
+        command = f"cmd{index}"
+        template = LEGACY_TEMPLATE if index < legacy_count else REGISTERED_TEMPLATE
+        (directory / f"bench_{index}.py").write_text(template.format(command=command), encoding="utf-8")
+        enabled[f"bench_{index}"] = True
+        commands.append(command)
+    (directory / "modules_state.json").write_text(json.dumps({"enabled": enabled}), encoding="utf-8")
+    return commands
+
+
+def install_modules(bot, directory):
+    manager = bot.module_manager
+    for module_name in [*manager.modules, *manager.lazy_modules]:
+        manager.unload(module_name)
+    manager.modules_dir = directory
+    manager.state = ModuleState(directory)
+    manager.module_metadata = ModuleMetadata(directory / "module_metadata.json")
+    manager.fingerprints.clear()
+    manager.load_all()
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def replay(bot, messages, rate, concurrency):
+    latencies = []
+    tasks = set()
+
+    async def timed(message):
+        start = time.perf_counter()
+        await bot.on_message(message)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for index, message in enumerate(messages):
+        if rate:
+            delay = start + index / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif len(tasks) >= concurrency:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        task = asyncio.create_task(timed(message))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    while bot.send_queue.depth():
+        await asyncio.sleep(0.01)
+    return sorted(latencies), elapsed
+
+
+async def run(args):
+    import runtime as bot
+    from throttle import Throttler
+
+    gateway = FakeGateway(send_delay=args.send_delay)
+    with tempfile.TemporaryDirectory() as directory:
+        commands = write_modules(Path(directory), args.modules, args.legacy_ratio)
+        install_modules(bot, Path(directory))
+        if not args.keep_limits:
+            bot.throttler = Throttler({})
+            bot.send_queue.rate = bot.send_queue.global_rate = float("inf")
+        prefix = bot.prefix_store.default[0]
+        if args.replay:
+            messages = list(gateway.recorded_stream(args.replay))
+        else:
+            messages = list(gateway.synthetic_stream(args.messages, prefix, commands))
+
+        gc.collect()
+        if not args.no_memory:
+            tracemalloc.start()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        latencies, elapsed = await replay(bot, messages, args.rate, args.concurrency)
+        memory_growth = 0.0
+        if not args.no_memory:
+            gc.collect()
+            memory_growth = (tracemalloc.get_traced_memory()[0] - memory_before) / 1024
+            tracemalloc.stop()
+        bot.executor.shutdown()
+        bot.module_manager.module_metadata.flush()
+
+    return {
+        "messages": len(messages),
+        "modules": args.modules,
+        "rate": args.rate,
+        "concurrency": args.concurrency,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        "messages_per_second": len(messages) / elapsed if elapsed else 0.0,
+        "memory_growth_kb": memory_growth,
+        "send_queue": bot.send_queue.stats(),
+    }
+
+
+def compare(report, baseline, tolerance):
+    regressions = []
+    for key in HIGHER_IS_WORSE + LOWER_IS_WORSE:
+        old, new = baseline.get(key), report[key]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = change > tolerance if key in HIGHER_IS_WORSE else change < -tolerance
+        print(f"  {key:<22} {old:>12.3f} -> {new:>12.3f} ({change:+.1%}){'  REGRESSION' if worse else ''}")
+        if worse:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    sys.argv = sys.argv[:1]
+    report = asyncio.run(run(args))
+    for key, value in report.items():
+        if key != "send_queue":
+            print(f"{key:<22} {value:>12.3f}" if isinstance(value, float) else f"{key:<22} {value:>12}")
+    print(f"{'send_queue':<22} {report['send_queue']}")
+    if args.save_baseline:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        with open(BASELINES_DIR / f"{args.save_baseline}.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+    if args.compare:
+        with open(BASELINES_DIR / f"{args.compare}.json", "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Compared with baseline {args.compare}:")
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
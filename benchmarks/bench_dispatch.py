@@ -0,0 +1,61 @@
+import sys
+import time
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from registry import CommandRegistry
+
+MODULE_COUNTS = [1, 10, 50, 100, 500]
+ITERATIONS = 2000
+
+
+def make_module(index, declared):
+    own_command = f"cmd{index}"
+
+    async def execute_command(command, message):
+        if command == own_command:
+            return own_command
+        return None
+
+    module = SimpleNamespace(execute_command=execute_command)
+    if declared:
+        module.bc_commands = [own_command]
+    return module
+
+
+async def linear_scan(modules, command, message):
+    for module in modules.values():
+        if hasattr(module, "execute_command"):
+            result = await module.execute_command(command, message)
+            if result is not None:
+                return result
+    return None
+
+
+async def measure(dispatch, command):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await dispatch(command, None)
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+async def main():
+    print(f"{'modules':>8} {'scan last':>12} {'scan miss':>12} {'lookup last':>12} {'lookup miss':>12}  (us/dispatch)")
+    for count in MODULE_COUNTS:
+        modules = {f"mod{i}": make_module(i, True) for i in range(count)}
+        registry = CommandRegistry()
+        for name, module in modules.items():
+            registry.register_module(name, module)
+        last = f"cmd{count - 1}"
+        scan_last = await measure(lambda c, m: linear_scan(modules, c, m), last)
+        scan_miss = await measure(lambda c, m: linear_scan(modules, c, m), "missing")
+        lookup_last = await measure(registry.dispatch, last)
+        lookup_miss = await measure(registry.dispatch, "missing")
+        print(f"{count:>8} {scan_last:>12.2f} {scan_miss:>12.2f} {lookup_last:>12.2f} {lookup_miss:>12.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+import json
+import random
+import asyncio
+import itertools
+
+_ids = itertools.count(1000)
+
+
+class FakeUser:
+    def __init__(self, user_id, name=None, bot=False):
+        self.id = user_id
+        self.name = name or f"user{user_id}"
+        self.display_name = self.name
+        self.mention = f"<@{user_id}>"
+        self.bot = bot
+
+    def __eq__(self, other):
+        return isinstance(other, FakeUser) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.name = f"guild{guild_id}"
+
+
+class FakeChannel:
+    def __init__(self, channel_id, guild=None, send_delay=0.0):
+        self.id = channel_id
+        self.guild = guild
+        self.send_delay = send_delay
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        self.sent += 1
+
+
+class FakeMessage:
+    def __init__(self, content, author, channel):
+        self.id = next(_ids)
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+
+
+class FakeGateway:
+    def __init__(self, guilds=10, channels_per_guild=5, users=500, send_delay=0.0):
+        self.guilds = [FakeGuild(guild_id) for guild_id in range(1, guilds + 1)]
+        self.channels = {}
+        for guild in self.guilds:
+            for index in range(channels_per_guild):
+                channel_id = guild.id * 1000 + index
+                self.channels[channel_id] = FakeChannel(channel_id, guild, send_delay)
+        self.users = {user_id: FakeUser(user_id) for user_id in range(1, users + 1)}
+
+    def message(self, content, author_id=None, channel_id=None):
+        author = self.users.get(author_id) or random.choice(list(self.users.values()))
+        channel = self.channels.get(channel_id) or random.choice(list(self.channels.values()))
+        return FakeMessage(content, author, channel)
+
+    def synthetic_stream(self, count, prefix, commands, unknown_ratio=0.05, chatter_ratio=0.3, seed=0):
+        rng = random.Random(seed)
+        users = list(self.users)
+        channels = list(self.channels)
+        for _ in range(count):
+            roll = rng.random()
+            if roll < chatter_ratio:
+                content = "just chatting about nothing in particular"
+            elif roll < chatter_ratio + unknown_ratio:
+                content = f"{prefix}nosuchcommand{rng.randrange(100)}"
+            else:
+                content = f"{prefix}{rng.choice(commands)} arg{rng.randrange(10)}"
+            yield self.message(content, rng.choice(users), rng.choice(channels))
+
+    def recorded_stream(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    event = json.loads(line)
+                    yield self.message(event["content"], event.get("author"), event.get("channel"))
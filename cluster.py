@@ -0,0 +1,90 @@
+import json
+import subprocess
+import urllib.request
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+IDENTIFY_INTERVAL = 5.5
+
+
+def gateway_info(token, timeout=10):
+    request = urllib.request.Request(GATEWAY_URL, headers={
+        "Authorization": f"Bot {token}",
+        "User-Agent": "DiscordBot (https://github.com/csgocs/Bot-Creator-BC, 2.1)"
+    })
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)
+
+
+def plan_clusters(shard_count, clusters):
+    clusters = max(1, min(clusters, shard_count))
+    base, extra = divmod(shard_count, clusters)
+    plan = []
+    start = 0
+    for cluster_id in range(clusters):
+        size = base + (1 if cluster_id < extra else 0)
+        plan.append(list(range(start, start + size)))
+        start += size
+    return plan
+
+
+def worker_args(cluster_id, shard_ids, shard_count, identify_delay):
+    return [
+        "--cluster-id", str(cluster_id),
+        "--shard-ids", ",".join(str(shard_id) for shard_id in shard_ids),
+        "--shard-count", str(shard_count),
+        "--identify-delay", f"{identify_delay:.1f}"
+    ]
+
+
+class ClusterLauncher:
+    def __init__(self, command, env=None):
+        self.command = [str(part) for part in command]
+        self.env = env
+        self.processes = []
+
+    def plan(self, token, sharding):
+        clusters = sharding.get("clusters", 1)
+        if clusters <= 1:
+            return []
+        shard_count = sharding.get("shard_count")
+        max_concurrency = sharding.get("max_concurrency", 1)
+        if not shard_count:
+            info = gateway_info(token)
+            shard_count = info["shards"]
+            max_concurrency = info.get("session_start_limit", {}).get("max_concurrency", max_concurrency)
+        return [
+            worker_args(cluster_id, shard_ids, shard_count, shard_ids[0] // max_concurrency * IDENTIFY_INTERVAL)
+            for cluster_id, shard_ids in enumerate(plan_clusters(shard_count, clusters))
+        ]
+
+    def start(self, token, sharding):
+        plan = self.plan(token, sharding) or [[]]
+        try:
+            for args in plan:
+                self.processes.append(subprocess.Popen(self.command + args, env=self.env))
+        except OSError:
+            self.stop()
+            raise
+        return len(self.processes)
+
+    def running(self):
+        return any(process.poll() is None for process in self.processes)
+
+    def exited(self):
+        return [process.returncode for process in self.processes if process.poll() is not None]
+
+    def wait(self):
+        for process in self.processes:
+            process.wait()
+
+    def stop(self, timeout=10):
+        for process in self.processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self.processes = []
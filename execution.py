@@ -0,0 +1,121 @@
+import sys
+import time
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+_executor = None
+
+
+class CommandTimeoutError(Exception):
+    def __init__(self, module_name, command, timeout):
+        super().__init__(f"Command {command} from module {module_name} timed out after {timeout}s")
+        self.module_name = module_name
+        self.command = command
+        self.timeout = timeout
+
+
+def _init_process_worker(base_dir):
+    if base_dir not in sys.path:
+        sys.path.insert(0, base_dir)
+
+
+class Executor:
+    def __init__(self, modules, base_dir, timeout=30, max_concurrency=4, thread_workers=None, process_workers=None):
+        self.modules = modules
+        self.base_dir = str(base_dir)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.semaphores = {}
+        self.thread_pool = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="bc-worker")
+        self.process_workers = process_workers
+        self.process_pool = None
+        self.metrics = None
+        self.active = {}
+
+    def command_timeout(self, module, command):
+        timeouts = getattr(module, "command_timeouts", {})
+        return timeouts.get(command, getattr(module, "command_timeout", self.timeout))
+
+    def semaphore(self, module_name, module):
+        limit = getattr(module, "max_concurrency", self.max_concurrency)
+        semaphore = self.semaphores.get(module_name)
+        if semaphore is None or semaphore[0] != limit:
+            semaphore = (limit, asyncio.Semaphore(limit))
+            self.semaphores[module_name] = semaphore
+        return semaphore[1]
+
+    async def dispatch(self, registry, command, message):
+        entry = registry.lookup(command)
+        if entry is not None:
+            module = self.modules.get(entry.module_name)
+            timeout = self.command_timeout(module, command)
+            running = [entry.module_name]
+        else:
+            timeout = self.timeout
+            running = [None]
+
+        async def run():
+            task = asyncio.current_task()
+            self.active[task] = (running[0], command)
+            try:
+                if entry is not None:
+                    async with self.semaphore(entry.module_name, module):
+                        result = await entry.handler(command, message)
+                    if result is not None:
+                        return result
+                for module_name, fallback in registry.fallback.items():
+                    running[0] = module_name
+                    result = await fallback.execute_command(command, message)
+                    if result is not None:
+                        return result
+                return None
+            finally:
+                del self.active[task]
+
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(run(), timeout or None)
+        except asyncio.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.observe_command(running[0], command, time.perf_counter() - start, "timeout")
+            raise CommandTimeoutError(running[0], command, timeout) from None
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.observe_command(running[0], command, time.perf_counter() - start, type(e).__name__)
+            raise
+        if result is not None and self.metrics is not None:
+            self.metrics.observe_command(running[0], command, time.perf_counter() - start)
+        return result
+
+    async def run_in_thread(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.thread_pool, functools.partial(func, *args, **kwargs))
+
+    async def run_in_process(self, func, *args, **kwargs):
+        if self.process_pool is None:
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                initializer=_init_process_worker,
+                initargs=(self.base_dir,)
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.process_pool, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def set_executor(executor):
+    global _executor
+    _executor = executor
+
+
+def run_in_thread(func, *args, **kwargs):
+    return _executor.run_in_thread(func, *args, **kwargs)
+
+
+def run_in_process(func, *args, **kwargs):
+    return _executor.run_in_process(func, *args, **kwargs)
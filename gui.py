@@ -1,16 +1,21 @@
 import sys
-import os
-import subprocess
+import math
+import threading
 import webbrowser
 import requests
 import json
 from packaging import version
 from pathlib import Path
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout, 
-                            QPushButton, QLabel, QCheckBox, QFrame, QHBoxLayout, QMessageBox, 
-                            QComboBox, QLineEdit)
+                            QPushButton, QLabel, QHBoxLayout, QMessageBox, 
+                            QComboBox, QLineEdit, QListView, QAbstractItemView)
 from PyQt6.QtGui import QPalette, QColor, QIcon
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, QObject, QFileSystemWatcher, pyqtSignal
+from supervisor import BotSupervisor
+from settings_store import SettingsStore
+from market import ChecksumError, MarketClient
+from module_models import ModuleFilterModel, ModuleListModel
+from module_state import ModuleState
 
 if getattr(sys, 'frozen', False):
     BASE_DIR = Path(sys.executable).resolve().parent
@@ -19,30 +24,43 @@ else:
 
 MODULES_DIR = BASE_DIR / "modules"
 BOT_FILE = BASE_DIR / "bot.exe"
-ON_OFF_FILE = MODULES_DIR / "on_off_modules.py"
 LANGUAGES_DIR = BASE_DIR / "languages"
 THEMES_DIR = BASE_DIR / "themes"
 SETTINGS_FILE = BASE_DIR / "settings.json"
+CACHE_DIR = BASE_DIR / "cache"
 MODULES_LIST_URL = "https://raw.githubusercontent.com/csgocs/Bot-Creator-BC/main/modules_list.json"
 VERSION_URL = "https://raw.githubusercontent.com/csgocs/Bot-Creator-BC/main/version.json"
 CURRENT_VERSION = "2.1"
 
+class MarketSignals(QObject):
+    index_loaded = pyqtSignal(object)
+    download_finished = pyqtSignal(str, str)
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("BC-Bot_Creator")
         self.setGeometry(100, 100, 700, 500)
-        self.bot_process = None
-        self.modules_vars = {}
-        self.settings = self.load_settings()
+        self.supervisor = None
+        self.settings_store = SettingsStore(SETTINGS_FILE)
+        self.module_state = ModuleState(MODULES_DIR)
+        self.load_settings()
         self.language = self.settings.get("language", "en")
         self.theme = self.settings.get("theme", "dark")
         self.translations = self.load_language(self.language)
+        self.market = MarketClient(MODULES_LIST_URL, CACHE_DIR, MODULES_DIR)
+        self.market_signals = MarketSignals()
+        self.market_signals.index_loaded.connect(self.show_market)
+        self.market_signals.download_finished.connect(self.on_module_downloaded)
+        self.setup_watcher()
         self.init_ui()
         self.apply_theme(self.theme)
-        self.setup_timer()
         self.setWindowIcon(QIcon(str(BASE_DIR / "icon.ico")))
 
+    @property
+    def settings(self):
+        return self.settings_store.load()
+
     def load_settings(self):
         if not SETTINGS_FILE.exists():
             default_settings = {
@@ -52,29 +70,36 @@ class MainWindow(QMainWindow):
                 "bot_prefix": "$",
                 "log_level": "INFO"
             }
-            with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-                json.dump(default_settings, f, indent=4)
-            return default_settings
-        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+            self.settings_store.update(default_settings)
+            self.settings_store.flush()
+        return self.settings_store.load()
 
     def save_settings(self):
-        with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-            json.dump(self.settings, f, indent=4)
+        self.settings_store.flush()
+
+    def closeEvent(self, event):
+        if self.supervisor is not None:
+            self.supervisor.stop()
+        self.save_settings()
+        self.market.close()
+        super().closeEvent(event)
 
     def load_language(self, lang):
         lang_file = LANGUAGES_DIR / f"{lang}.json"
         if not lang_file.exists():
             return {
                 "title": "Bot Hub", "bot_control": "Bot Control", "start_bot": "Start Bot", "stop_bot": "Stop Bot",
-                "bot_stopped": "Bot Stopped", "bot_running": "Bot Running",
+                "bot_stopped": "Bot Stopped", "bot_running": "Bot Running", "bot_starting": "Bot Starting...",
+                "bot_restarting": "Bot Restarting in {seconds}s ({reason})", "bot_stopping": "Bot Stopping...",
+                "bot_stats": "Guilds: {guilds} | Latency: {latency} ms | Commands/s: {rate:.1f} | Restarts: {restarts}",
                 "modules_market": "Modules Market", "refresh_market": "Refresh Market", "installed_modules": "Installed Modules",
                 "save_changes": "Save Changes", "settings": "Settings", "language": "Language", "theme": "Theme",
                 "check_updates": "Check for Updates", "restart_prompt": "Please restart the application to apply the new language.",
                 "download": "Download", "new_version": "New version {version} available! Download now?",
                 "latest_version": "You have the latest version: {version}",
                 "bot_token": "Bot Token", "bot_prefix": "Bot Prefix", "log_level": "Log Level",
-                "bot_settings": "Bot Settings", "bc_settings": "BC Settings"
+                "bot_settings": "Bot Settings", "bc_settings": "BC Settings",
+                "search": "Search...", "open_readme": "Open README"
             }
         with open(lang_file, "r", encoding="utf-8") as f:
             return json.load(f)
@@ -114,10 +139,25 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(self.create_modules_tab(), self.translations["installed_modules"])
         self.tabs.addTab(self.create_settings_tab(), self.translations["settings"])
 
-    def setup_timer(self):
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_modules_list)
-        self.timer.start(30000)
+    def setup_watcher(self):
+        MODULES_DIR.mkdir(exist_ok=True)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(200)
+        self.refresh_timer.timeout.connect(self.update_modules_list)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_modules_changed)
+        self.watcher.fileChanged.connect(self.on_modules_changed)
+        self.watch_modules()
+
+    def watch_modules(self):
+        paths = [str(path) for path in (MODULES_DIR, self.module_state.path) if path.exists()]
+        missing = set(paths) - set(self.watcher.directories()) - set(self.watcher.files())
+        if missing:
+            self.watcher.addPaths(list(missing))
+
+    def on_modules_changed(self, path):
+        self.refresh_timer.start()
 
     def create_bot_tab(self):
         bot_tab = QWidget()
@@ -134,6 +174,11 @@ class MainWindow(QMainWindow):
         self.status_label = QLabel(self.translations["bot_stopped"])
         self.status_label.setStyleSheet("color: red")
         layout.addWidget(self.status_label)
+        self.stats_label = QLabel("")
+        layout.addWidget(self.stats_label)
+        self.status_timer = QTimer(self)
+        self.status_timer.setInterval(1000)
+        self.status_timer.timeout.connect(self.update_bot_status)
         layout.addStretch()
         return bot_tab
 
@@ -145,12 +190,30 @@ class MainWindow(QMainWindow):
         refresh_button = QPushButton(self.translations["refresh_market"])
         refresh_button.clicked.connect(self.refresh_market)
         layout.addWidget(refresh_button)
-        self.market_container = QWidget()
-        self.market_layout = QVBoxLayout()
-        self.market_container.setLayout(self.market_layout)
-        layout.addWidget(self.market_container)
+        self.market_model = ModuleListModel()
+        self.market_filter = ModuleFilterModel(self.market_model)
+        market_search = QLineEdit()
+        market_search.setPlaceholderText(self.translations["search"])
+        market_search.textChanged.connect(self.market_filter.set_query)
+        layout.addWidget(market_search)
+        self.market_view = QListView()
+        self.market_view.setModel(self.market_filter)
+        self.market_view.setUniformItemSizes(True)
+        self.market_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.market_view.doubleClicked.connect(self.open_readme)
+        layout.addWidget(self.market_view)
+        self.market_empty_label = QLabel("No modules available or connection error")
+        layout.addWidget(self.market_empty_label)
+        buttons_layout = QHBoxLayout()
+        readme_button = QPushButton(self.translations["open_readme"])
+        readme_button.clicked.connect(lambda: self.open_readme(self.market_view.currentIndex()))
+        buttons_layout.addWidget(readme_button)
+        download_button = QPushButton(self.translations["download"])
+        download_button.clicked.connect(self.download_selected)
+        buttons_layout.addWidget(download_button)
+        layout.addLayout(buttons_layout)
+        self.show_market(self.market.cached_index())
         self.refresh_market()
-        layout.addStretch()
         return market_tab
 
     def create_modules_tab(self):
@@ -158,15 +221,20 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout()
         modules_tab.setLayout(layout)
         layout.addWidget(QLabel(self.translations["installed_modules"]))
-        self.modules_container = QWidget()
-        self.modules_layout = QVBoxLayout()
-        self.modules_container.setLayout(self.modules_layout)
-        layout.addWidget(self.modules_container)
+        self.modules_model = ModuleListModel(checkable=True)
+        self.modules_filter = ModuleFilterModel(self.modules_model)
+        modules_search = QLineEdit()
+        modules_search.setPlaceholderText(self.translations["search"])
+        modules_search.textChanged.connect(self.modules_filter.set_query)
+        layout.addWidget(modules_search)
+        modules_view = QListView()
+        modules_view.setModel(self.modules_filter)
+        modules_view.setUniformItemSizes(True)
+        layout.addWidget(modules_view)
         save_button = QPushButton(self.translations["save_changes"])
         save_button.clicked.connect(self.save_modules_state)
         layout.addWidget(save_button)
         self.update_modules_list()
-        layout.addStretch()
         return modules_tab
 
     def create_settings_tab(self):
@@ -259,33 +327,25 @@ class MainWindow(QMainWindow):
             self.theme_combo.setCurrentText(self.theme)
 
     def change_language(self, lang):
-        self.settings["language"] = lang
-        self.save_settings()
+        self.settings_store.set("language", lang)
         QMessageBox.information(self, "Restart Required", self.translations["restart_prompt"])
         self.translations = self.load_language(lang)
 
     def change_theme(self, theme):
-        self.settings["theme"] = theme
-        self.save_settings()
+        self.settings_store.set("theme", theme)
         self.apply_theme(theme)
 
     def update_token(self, text):
-        self.settings["bot_token"] = text
-        self.save_settings()
-        if self.bot_process:
+        self.settings_store.set("bot_token", text)
+        if self.supervisor:
             QMessageBox.warning(self, "Restart Required", "Please restart the bot to apply the new token.")
 
     def update_prefix(self, text):
-        self.settings["bot_prefix"] = text
-        self.save_settings()
-        if self.bot_process:
-            QMessageBox.warning(self, "Restart Required", "Please restart the bot to apply the new prefix.")
+        if text:
+            self.settings_store.set("bot_prefix", text)
 
     def update_log_level(self, level):
-        self.settings["log_level"] = level
-        self.save_settings()
-        if self.bot_process:
-            QMessageBox.warning(self, "Restart Required", "Please restart the bot to apply the new log level.")
+        self.settings_store.set("log_level", level)
 
     def check_for_updates(self):
         try:
@@ -310,102 +370,134 @@ class MainWindow(QMainWindow):
         if not BOT_FILE.exists():
             QMessageBox.critical(self, "Error", f"Bot executable not found at {BOT_FILE}")
             return
-        if self.bot_process is None:
+        if self.supervisor is None:
+            supervisor_settings = self.settings.get("supervisor", {})
+            supervisor = BotSupervisor(
+                [BOT_FILE],
+                hang_timeout=supervisor_settings.get("hang_timeout", 30),
+                startup_timeout=supervisor_settings.get("startup_timeout", 120),
+                drain_timeout=supervisor_settings.get("drain_timeout", 30),
+                max_backoff=supervisor_settings.get("max_backoff", 60)
+            )
             try:
-                self.bot_process = subprocess.Popen([BOT_FILE])
-                self.start_button.setEnabled(False)
-                self.stop_button.setEnabled(True)
-                self.status_label.setText(self.translations["bot_running"])
-                self.status_label.setStyleSheet("color: green")
+                supervisor.start(self.settings.get("bot_token", ""), self.settings.get("sharding", {}))
             except OSError as e:
                 QMessageBox.critical(self, "Error", f"Failed to start bot: {e}")
+                return
+            self.supervisor = supervisor
+            self.start_button.setEnabled(False)
+            self.stop_button.setEnabled(True)
+            self.status_timer.start()
+            self.update_bot_status()
         else:
             QMessageBox.warning(self, "Warning", "Bot is already running!")
 
     def stop_bot(self):
-        if self.bot_process is not None:
-            self.bot_process.terminate()
-            self.bot_process = None
+        if self.supervisor is not None:
+            self.stop_button.setEnabled(False)
+            threading.Thread(target=self.supervisor.stop, name="bc-supervisor-stop", daemon=True).start()
+            self.update_bot_status()
+        else:
+            QMessageBox.warning(self, "Warning", "Bot is not running!")
+
+    def update_bot_status(self):
+        stats = self.supervisor.stats()
+        state = stats["state"]
+        if state == "stopped":
+            self.supervisor = None
+            self.status_timer.stop()
             self.start_button.setEnabled(True)
             self.stop_button.setEnabled(False)
             self.status_label.setText(self.translations["bot_stopped"])
             self.status_label.setStyleSheet("color: red")
+            self.stats_label.setText(stats["reason"] or "")
+            return
+        if state == "running":
+            status = self.translations["bot_running"]
+            if stats["workers"] > 1:
+                status = f"{status} ({stats['workers']} clusters)"
+        elif state == "starting":
+            status = self.translations["bot_starting"]
+        elif state == "backoff":
+            status = self.translations["bot_restarting"].format(
+                seconds=math.ceil(stats["restart_in"]), reason=stats["reason"]
+            )
         else:
-            QMessageBox.warning(self, "Warning", "Bot is not running!")
-
-    def get_available_modules(self):
+            status = self.translations["bot_stopping"]
+        self.status_label.setText(status)
+        self.status_label.setStyleSheet(f"color: {'green' if state == 'running' else 'orange'}")
+        latency = "-" if stats["latency"] is None else f"{stats['latency'] * 1000:.0f}"
+        self.stats_label.setText(self.translations["bot_stats"].format(
+            guilds=stats["guilds"], latency=latency, rate=stats["commands_per_second"], restarts=stats["restarts"]
+        ))
+
+    def on_market_fetched(self, future):
+        if future.cancelled():
+            return
         try:
-            response = requests.get(MODULES_LIST_URL)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            modules = future.result()
+        except (requests.RequestException, ValueError, OSError) as e:
             print(f"Failed to fetch module list: {e}")
-            return []
+            return
+        if modules is not None:
+            self.market_signals.index_loaded.emit(modules)
 
-    def download_module(self, module_name, download_url):
+    def download_module(self, module):
+        future = self.market.submit(self.market.download, module)
+        future.add_done_callback(lambda f, name=module["name"]: self.on_download_done(name, f))
+
+    def on_download_done(self, module_name, future):
+        if future.cancelled():
+            return
+        error = ""
         try:
-            response = requests.get(download_url)
-            response.raise_for_status()
-            if not MODULES_DIR.exists():
-                MODULES_DIR.mkdir()
-            module_path = MODULES_DIR / f"{module_name}.py"
-            with open(module_path, "wb") as f:
-                f.write(response.content)
-            self.update_modules_list()
-            return True
-        except requests.RequestException as e:
-            print(f"Failed to download {module_name}: {e}")
-            return False
-        except OSError as e:
-            print(f"Failed to write {module_name} to {module_path}: {e}")
-            return False
+            future.result()
+        except (requests.RequestException, ChecksumError, OSError) as e:
+            error = str(e)
+        self.market_signals.download_finished.emit(module_name, error)
+
+    def on_module_downloaded(self, module_name, error):
+        if error:
+            print(f"Failed to download {module_name}: {error}")
+            QMessageBox.critical(self, "Error", f"Failed to download {module_name}: {error}")
+            return
+        self.update_modules_list()
 
     def refresh_market(self):
-        for i in reversed(range(self.market_layout.count())):
-            self.market_layout.itemAt(i).widget().setParent(None)
-        modules = self.get_available_modules()
-        if not modules:
-            self.market_layout.addWidget(QLabel("No modules available or connection error"))
-            return
-        for module in modules:
-            frame = QFrame()
-            h_layout = QHBoxLayout()
-            frame.setLayout(h_layout)
-            name_button = QPushButton(f"{module['name']} - {module['description']}")
-            name_button.clicked.connect(lambda _, url=module["readme_url"]: webbrowser.open(url))
-            h_layout.addWidget(name_button)
-            download_button = QPushButton(self.translations["download"])
-            download_button.clicked.connect(lambda _, m=module["name"], url=module["download_url"]: self.download_module(m, url))
-            h_layout.addWidget(download_button)
-            self.market_layout.addWidget(frame)
+        future = self.market.submit(self.market.fetch_index)
+        future.add_done_callback(self.on_market_fetched)
+
+    def show_market(self, modules):
+        self.market_model.set_items([dict(module) for module in modules])
+        self.market_empty_label.setVisible(not modules)
+
+    def open_readme(self, index):
+        module = index.data(ModuleListModel.ItemRole) if index.isValid() else None
+        if module is not None:
+            webbrowser.open(module["readme_url"])
+
+    def download_selected(self):
+        for index in self.market_view.selectionModel().selectedIndexes():
+            self.download_module(index.data(ModuleListModel.ItemRole))
 
     def load_modules_state(self):
-        if not os.path.exists(ON_OFF_FILE):
-            with open(ON_OFF_FILE, "w", encoding="utf-8") as f:
-                f.write("enabled_modules = {}\n")
-        with open(ON_OFF_FILE, "r", encoding="utf-8") as f:
-            exec(f.read(), globals())
-        return globals().get("enabled_modules", {})
+        return self.module_state.enabled_modules()
 
     def save_modules_state(self):
-        enabled_modules = {name: cb.isChecked() for name, cb in self.modules_vars.items()}
-        with open(ON_OFF_FILE, "w", encoding="utf-8") as f:
-            f.write(f"enabled_modules = {enabled_modules}\n")
+        enabled_modules = {item["name"]: item["enabled"] for item in self.modules_model.items}
+        self.module_state.set_enabled(enabled_modules)
+        self.module_state.flush()
+        self.modules_model.mark_saved()
         QMessageBox.information(self, "Success", "Modules state saved!")
 
     def update_modules_list(self):
-        for i in reversed(range(self.modules_layout.count())):
-            self.modules_layout.itemAt(i).widget().setParent(None)
         enabled_modules = self.load_modules_state()
-        self.modules_vars.clear()
-        for module_file in list(MODULES_DIR.glob("*.py")):
-            module_name = module_file.stem
-            if module_name == "on_off_modules":
-                continue
-            cb = QCheckBox(module_name)
-            cb.setChecked(enabled_modules.get(module_name, False))
-            self.modules_vars[module_name] = cb
-            self.modules_layout.addWidget(cb)
+        self.modules_model.set_items([
+            {"name": module_file.stem, "enabled": enabled_modules.get(module_file.stem, False)}
+            for module_file in sorted(MODULES_DIR.glob("*.py"))
+            if module_file.stem != "on_off_modules"
+        ])
+        self.watch_modules()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,66 @@
+import logging
+import disnake
+
+log = logging.getLogger(__name__)
+
+BASE_INTENTS = ("guilds", "guild_messages", "dm_messages", "message_content")
+PRIVILEGED_INTENTS = ("members", "presences", "message_content")
+MEMBER_CACHE_INTENTS = {"voice": "voice_states", "joined": "members"}
+
+
+def _member_cache_flags(declared):
+    if declared in (None, "none"):
+        return []
+    if declared == "all":
+        return list(MEMBER_CACHE_INTENTS)
+    if isinstance(declared, str):
+        return [declared]
+    return list(declared)
+
+
+def resolve_intents(manifests, mode="auto", extra_intents=()):
+    if mode == "all":
+        intents = disnake.Intents.all()
+        return intents, disnake.MemberCacheFlags.from_intents(intents), {"all": ["settings"]}
+    intents = disnake.Intents.none()
+    member_cache = disnake.MemberCacheFlags.none()
+    sources = {}
+
+    def enable(flag, source):
+        if flag not in disnake.Intents.VALID_FLAGS:
+            log.warning("Unknown intent %s requested by %s", flag, source)
+            return
+        setattr(intents, flag, True)
+        sources.setdefault(flag, []).append(source)
+
+    for flag in BASE_INTENTS:
+        enable(flag, "core")
+    for flag in extra_intents:
+        enable(flag, "settings")
+    for module_name, manifest in manifests.items():
+        for flag in manifest["intents"]:
+            enable(flag, module_name)
+        for flag in _member_cache_flags(manifest["member_cache"]):
+            if flag not in MEMBER_CACHE_INTENTS:
+                log.warning("Unknown member cache flag %s requested by %s", flag, module_name)
+                continue
+            setattr(member_cache, flag, True)
+            enable(MEMBER_CACHE_INTENTS[flag], f"{module_name} (member cache: {flag})")
+    return intents, member_cache, sources
+
+
+def missing_intents(intents, manifest):
+    required = list(manifest["intents"])
+    required += [MEMBER_CACHE_INTENTS[flag] for flag in _member_cache_flags(manifest["member_cache"])
+                 if flag in MEMBER_CACHE_INTENTS]
+    return [flag for flag in required if flag in disnake.Intents.VALID_FLAGS and not getattr(intents, flag)]
+
+
+def intents_report(intents, member_cache, sources):
+    lines = [f"Gateway intents (value {intents.value}):"]
+    for flag, modules in sorted(sources.items()):
+        privileged = " [privileged]" if flag in PRIVILEGED_INTENTS else ""
+        lines.append(f"  {flag:<24} {', '.join(modules)}{privileged}")
+    cached = [flag for flag, enabled in member_cache if enabled]
+    lines.append(f"Member cache: {', '.join(cached) if cached else 'none'}")
+    return lines
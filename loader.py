@@ -0,0 +1,380 @@
+import ast
+import sys
+import time
+import asyncio
+import hashlib
+import logging
+import importlib.util
+from intents import missing_intents
+from module_state import ModuleState, ModuleMetadata
+from registry import COMMANDS_ATTRIBUTE
+
+
+MODULES_PACKAGE = "modules"
+APP_COMMAND_KINDS = ("slash", "user", "message")
+
+log = logging.getLogger(__name__)
+
+
+def import_module_file(module_name, module_file, qualified_name=None):
+    spec = importlib.util.spec_from_file_location(qualified_name or module_name, module_file)
+    module = importlib.util.module_from_spec(spec)
+    if qualified_name is None:
+        spec.loader.exec_module(module)
+        return module
+    previous = sys.modules.get(qualified_name)
+    sys.modules[qualified_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        if previous is None:
+            sys.modules.pop(qualified_name, None)
+        else:
+            sys.modules[qualified_name] = previous
+        raise
+    return module
+
+
+def _literal(node, default=None):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        return default
+
+
+def read_manifest(module_file):
+    tree = ast.parse(module_file.read_text(encoding="utf-8"), filename=str(module_file))
+    manifest = {"commands": None, "aliases": {}, "lazy": None, "intents": [], "member_cache": None, "has_setup": False}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "setup":
+            manifest["has_setup"] = True
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name == COMMANDS_ATTRIBUTE:
+                if isinstance(node.value, ast.Dict):
+                    keys = [_literal(key) for key in node.value.keys]
+                else:
+                    keys = _literal(node.value)
+                if isinstance(keys, (list, tuple)) and all(isinstance(key, str) for key in keys):
+                    manifest["commands"] = list(keys)
+            elif name in ("aliases", "lazy", "intents", "member_cache"):
+                manifest[name] = _literal(node.value, manifest[name])
+    if not isinstance(manifest["aliases"], dict):
+        manifest["aliases"] = {}
+    return manifest
+
+
+def is_lazy_candidate(manifest, lazy_mode):
+    if manifest["has_setup"] or not manifest["commands"]:
+        return False
+    if manifest["lazy"] is None:
+        return lazy_mode
+    return bool(manifest["lazy"])
+
+
+class ImportTimeline:
+    def __init__(self):
+        self.entries = []
+
+    def import_module(self, module_name, module_file, mode="eager"):
+        start = time.perf_counter()
+        module = import_module_file(module_name, module_file, f"{MODULES_PACKAGE}.{module_name}")
+        self.entries.append((module_name, time.perf_counter() - start, mode))
+        return module
+
+    def defer(self, module_name):
+        self.entries.append((module_name, 0.0, "deferred"))
+
+    def report(self):
+        lines = []
+        total = 0.0
+        for module_name, seconds, mode in sorted(self.entries, key=lambda entry: entry[1], reverse=True):
+            total += seconds
+            lines.append(f"  {module_name:<30} {seconds * 1000:>9.2f} ms  {mode}")
+        lines.insert(0, f"Module import timeline ({len(self.entries)} modules, {total * 1000:.2f} ms total):")
+        return lines
+
+
+class LazyModule:
+    def __init__(self, module_name, module_file, manifest, timeline):
+        self.name = module_name
+        self.file = module_file
+        self.manifest = manifest
+        self.timeline = timeline
+        self.module = None
+
+    def load(self):
+        if self.module is None:
+            self.module = self.timeline.import_module(self.name, self.file, mode="lazy")
+            log.info("Lazy module %s imported in %.2f ms", self.name, self.timeline.entries[-1][1] * 1000)
+        return self.module
+
+    def register(self, registry, on_load):
+        async def handler(command, message):
+            module = self.load()
+            registry.unregister_module(self.name)
+            registry.register_module(self.name, module)
+            on_load(self.name, module)
+            entry = registry.lookup(command)
+            if entry is not None and entry.module_name == self.name:
+                return await entry.handler(command, message)
+            if hasattr(module, "execute_command"):
+                return await module.execute_command(command, message)
+            return None
+
+        for name in self.manifest["commands"]:
+            registry.register(name, handler, self.name)
+        for alias, target in self.manifest["aliases"].items():
+            registry.register_alias(alias, target, self.name)
+
+
+def fingerprint(module_file):
+    stat = module_file.stat()
+    return stat.st_mtime_ns, stat.st_size, hashlib.sha256(module_file.read_bytes()).hexdigest()
+
+
+class ModuleManager:
+    def __init__(self, registry, modules_dir, metadata_path, lazy_mode=False):
+        self.bot = None
+        self.registry = registry
+        self.modules_dir = modules_dir
+        self.state = ModuleState(modules_dir)
+        self.module_metadata = ModuleMetadata(metadata_path)
+        self.lazy_mode = lazy_mode
+        self.timeline = ImportTimeline()
+        self.modules = {}
+        self.lazy_modules = {}
+        self.setup_hooks = {}
+        self.unload_hooks = []
+        self.fingerprints = {}
+        self.manifests = {}
+        self.loaded_metadata = {}
+        self.watch_task = None
+
+    def module_files(self):
+        return {
+            module_file.stem: module_file
+            for module_file in self.modules_dir.glob("*.py")
+            if module_file.stem != "on_off_modules"
+        }
+
+    def enabled_modules(self):
+        return self.state.enabled_modules()
+
+    def cached_fingerprint(self, module_file):
+        stat = module_file.stat()
+        meta = self.module_metadata.metadata(module_file.stem)
+        if meta is None or (meta["mtime_ns"], meta["size"]) != (stat.st_mtime_ns, stat.st_size):
+            return fingerprint(module_file)
+        if self.manifests.get(module_file, (None,))[0] != meta["hash"]:
+            self.manifests[module_file] = (meta["hash"], meta["manifest"])
+        return stat.st_mtime_ns, stat.st_size, meta["hash"]
+
+    def save_metadata(self):
+        self.module_metadata.record(self.loaded_metadata)
+        self.loaded_metadata = {}
+
+    def manifest(self, module_file):
+        if module_file not in self.fingerprints:
+            self.fingerprints[module_file] = self.cached_fingerprint(module_file)
+        digest = self.fingerprints[module_file][2]
+        cached = self.manifests.get(module_file)
+        if cached is None or cached[0] != digest:
+            cached = self.manifests[module_file] = (digest, read_manifest(module_file))
+        return cached[1]
+
+    def enabled_manifests(self):
+        enabled_modules = self.enabled_modules()
+        manifests = {}
+        for module_name, module_file in self.module_files().items():
+            if enabled_modules.get(module_name, False):
+                try:
+                    manifests[module_name] = self.manifest(module_file)
+                except SyntaxError as e:
+                    log.error("Failed to read module %s: %s", module_name, e)
+        return manifests
+
+    def load_all(self):
+        enabled_modules = self.enabled_modules()
+        for module_name, module_file in self.module_files().items():
+            if module_file not in self.fingerprints:
+                self.fingerprints[module_file] = self.cached_fingerprint(module_file)
+            if enabled_modules.get(module_name, False):
+                self.load(module_name, module_file)
+        if self.state.path.exists():
+            self.fingerprints[self.state.path] = fingerprint(self.state.path)
+        self.save_metadata()
+        return self.modules
+
+    def load(self, module_name, module_file):
+        try:
+            manifest = self.manifest(module_file)
+            missing = missing_intents(self.bot.intents, manifest)
+            if missing:
+                log.warning("Module %s needs intents %s, restart the bot to enable them", module_name, ", ".join(missing))
+            module = None
+            if not is_lazy_candidate(manifest, self.lazy_mode):
+                module = self.timeline.import_module(module_name, module_file)
+        except Exception as e:
+            log.exception("Failed to load module %s: %s", module_name, e)
+            return False
+        previous = None
+        if self.is_loaded(module_name):
+            previous = self.modules.get(module_name), self.lazy_modules.get(module_name)
+            self.unload(module_name)
+        try:
+            if module is None:
+                self.activate_lazy(module_name, LazyModule(module_name, module_file, manifest, self.timeline))
+                self.timeline.defer(module_name)
+            else:
+                self.activate(module_name, module)
+        except Exception as e:
+            log.exception("Failed to activate module %s: %s", module_name, e)
+            self.unload(module_name, teardown=False)
+            if module is not None and sys.modules.get(module.__name__) is module:
+                del sys.modules[module.__name__]
+            if previous is not None:
+                self.restore(module_name, *previous)
+            return False
+        mtime_ns, size, digest = self.fingerprints[module_file]
+        self.loaded_metadata[module_name] = {
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "hash": digest,
+            "loaded_at": time.time(),
+            "manifest": manifest,
+        }
+        return True
+
+    def activate(self, module_name, module):
+        self.registry.register_module(module_name, module)
+        self.modules[module_name] = module
+        if hasattr(module, "setup"):
+            self.run_setup(module_name, module)
+
+    def activate_lazy(self, module_name, lazy_module):
+        self.lazy_modules[module_name] = lazy_module
+        lazy_module.register(self.registry, self.on_lazy_load)
+
+    def restore(self, module_name, module, lazy_module):
+        try:
+            if module is None:
+                self.activate_lazy(module_name, lazy_module)
+            else:
+                sys.modules[module.__name__] = module
+                self.activate(module_name, module)
+        except Exception as e:
+            log.exception("Failed to restore module %s: %s", module_name, e)
+            self.unload(module_name, teardown=False)
+            return
+        log.warning("Kept the previous version of module %s", module_name)
+
+    def on_lazy_load(self, module_name, module):
+        if self.lazy_modules.pop(module_name, None) is not None:
+            self.modules[module_name] = module
+
+    def run_setup(self, module_name, module):
+        listeners = {event: list(funcs) for event, funcs in self.bot.extra_events.items()}
+        bot_commands = set(self.bot.all_commands)
+        cogs = set(self.bot.cogs)
+        app_commands = {kind: set(getattr(self.bot, f"all_{kind}_commands")) for kind in APP_COMMAND_KINDS}
+        try:
+            module.setup(self.bot)
+        finally:
+            self.setup_hooks[module_name] = {
+                "listeners": [
+                    (event, func)
+                    for event, funcs in self.bot.extra_events.items()
+                    for func in funcs
+                    if func not in listeners.get(event, [])
+                ],
+                "commands": set(self.bot.all_commands) - bot_commands,
+                "cogs": set(self.bot.cogs) - cogs,
+                "app_commands": {
+                    kind: set(getattr(self.bot, f"all_{kind}_commands")) - app_commands[kind]
+                    for kind in APP_COMMAND_KINDS
+                },
+            }
+
+    def is_loaded(self, module_name):
+        return module_name in self.modules or module_name in self.lazy_modules
+
+    def unload(self, module_name, teardown=True):
+        module = self.modules.pop(module_name, None)
+        self.lazy_modules.pop(module_name, None)
+        if module is not None and sys.modules.get(module.__name__) is module:
+            del sys.modules[module.__name__]
+        for hook in self.unload_hooks:
+            hook(module_name)
+        self.registry.unregister_module(module_name)
+        if teardown and module is not None and hasattr(module, "teardown"):
+            try:
+                module.teardown(self.bot)
+            except Exception as e:
+                log.exception("Module %s teardown error: %s", module_name, e)
+        hooks = self.setup_hooks.pop(module_name, {})
+        for event, func in hooks.get("listeners", []):
+            self.bot.remove_listener(func, event)
+        for name in hooks.get("commands", ()):
+            self.bot.remove_command(name)
+        for name in hooks.get("cogs", ()):
+            self.bot.remove_cog(name)
+        for kind, names in hooks.get("app_commands", {}).items():
+            remove = getattr(self.bot, f"remove_{kind}_command")
+            for name in names:
+                remove(name)
+
+    def poll(self):
+        module_files = self.module_files()
+        watched = [*module_files.values(), self.state.path]
+        changed = {module_file.stem for module_file in self.fingerprints if module_file not in watched}
+        for module_file in list(self.fingerprints):
+            if module_file not in watched:
+                del self.fingerprints[module_file]
+                self.manifests.pop(module_file, None)
+        for module_file in watched:
+            if not module_file.exists():
+                continue
+            old = self.fingerprints.get(module_file)
+            stat = module_file.stat()
+            if old is not None and old[:2] == (stat.st_mtime_ns, stat.st_size):
+                continue
+            new = fingerprint(module_file)
+            self.fingerprints[module_file] = new
+            if old is None or old[2] != new[2]:
+                changed.add(module_file.stem)
+        if not changed:
+            return
+        self.module_metadata.forget([module_name for module_name in changed if module_name not in module_files])
+        enabled_modules = self.enabled_modules()
+        try:
+            for module_name in [*self.modules, *self.lazy_modules]:
+                if module_name not in module_files or not enabled_modules.get(module_name, False):
+                    try:
+                        self.unload(module_name)
+                    except Exception as e:
+                        log.exception("Failed to unload module %s: %s", module_name, e)
+                        continue
+                    log.info("Module %s unloaded", module_name)
+            for module_name, module_file in module_files.items():
+                if not enabled_modules.get(module_name, False):
+                    continue
+                if not self.is_loaded(module_name):
+                    if self.load(module_name, module_file):
+                        log.info("Module %s loaded", module_name)
+                elif module_name in changed and self.load(module_name, module_file):
+                    log.info("Module %s reloaded", module_name)
+        finally:
+            self.save_metadata()
+
+    async def watch(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.poll()
+            except Exception as e:
+                log.exception("Module watcher error: %s", e)
+
+    def start_watching(self, interval):
+        if interval and self.watch_task is None:
+            self.watch_task = asyncio.create_task(self.watch(interval))
@@ -0,0 +1,92 @@
+import sys
+import queue
+import logging
+import logging.handlers
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s%(context)s: %(message)s"
+CONTEXT_FIELDS = (
+    ("guild", "guild"), ("channel", "channel"), ("user", "user"),
+    ("module_name", "module"), ("command", "command"), ("latency", "latency")
+)
+
+_listener = None
+_sample_rates = {}
+
+
+class ContextFilter(logging.Filter):
+    def filter(self, record):
+        fields = [
+            f"{label}={getattr(record, field)}"
+            for field, label in CONTEXT_FIELDS
+            if getattr(record, field, None) is not None
+        ]
+        record.context = f" [{' '.join(fields)}]" if fields else ""
+        return True
+
+
+class Sampler:
+    def __init__(self, rate):
+        self.every = round(1 / rate) if rate > 0 else 0
+        self.count = 0
+
+    def __call__(self):
+        if not self.every:
+            return False
+        self.count += 1
+        return self.count % self.every == 0
+
+
+def command_context(message, module_name=None, command=None, latency=None):
+    return {
+        "guild": message.guild.id if message.guild else None,
+        "channel": message.channel.id,
+        "user": message.author.id,
+        "module_name": module_name,
+        "command": command,
+        "latency": f"{latency * 1000:.2f}ms" if latency is not None else None,
+    }
+
+
+def apply_levels(level, levels):
+    logging.getLogger().setLevel(level)
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+
+def sampler(name):
+    return Sampler(_sample_rates.get(name, 1.0))
+
+
+def setup_logging(level, config, log_file):
+    global _listener
+    formatter = logging.Formatter(LOG_FORMAT)
+    context_filter = ContextFilter()
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if config.get("file", True):
+        log_file.parent.mkdir(exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=config.get("max_bytes", 5 * 1024 * 1024),
+            backupCount=config.get("backup_count", 5),
+            encoding="utf-8"
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.addFilter(context_filter)
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _sample_rates.update(config.get("sample_rates", {}))
+    logging.getLogger("disnake").setLevel(logging.WARNING)
+    apply_levels(level, config.get("levels", {}))
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,105 @@
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from settings_store import write_json_atomic
+
+
+class ChecksumError(Exception):
+    pass
+
+
+class MarketClient:
+    def __init__(self, index_url, cache_dir, modules_dir, timeout=10, workers=4):
+        self.index_url = index_url
+        self.cache_dir = cache_dir
+        self.modules_dir = modules_dir
+        self.index_file = cache_dir / "modules_list.json"
+        self.meta_file = cache_dir / "market_cache.json"
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=workers,
+            max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504))
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bc-market")
+        self.lock = threading.Lock()
+        self.meta = self.load_meta()
+
+    def load_meta(self):
+        try:
+            with open(self.meta_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_meta(self, url, response):
+        validators = {
+            key: response.headers[header]
+            for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+            if header in response.headers
+        }
+        with self.lock:
+            self.meta[url] = validators
+            self.cache_dir.mkdir(exist_ok=True)
+            write_json_atomic(self.meta_file, self.meta)
+
+    def conditional_get(self, url, cached):
+        headers = {}
+        validators = self.meta.get(url, {}) if cached else {}
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        return response
+
+    def cached_index(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def fetch_index(self):
+        response = self.conditional_get(self.index_url, self.index_file.exists())
+        if response is None:
+            return None
+        modules = response.json()
+        self.cache_dir.mkdir(exist_ok=True)
+        write_json_atomic(self.index_file, modules)
+        self.save_meta(self.index_url, response)
+        return modules
+
+    def download(self, module):
+        module_path = self.modules_dir / f"{module['name']}.py"
+        response = self.conditional_get(module["download_url"], module_path.exists())
+        if response is None:
+            return module_path
+        content = response.content
+        expected = module.get("sha256")
+        if expected and hashlib.sha256(content).hexdigest() != expected.lower():
+            raise ChecksumError(f"Checksum mismatch for {module['name']}")
+        self.modules_dir.mkdir(exist_ok=True)
+        temp_path = module_path.with_name(f".{module_path.name}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        temp_path.replace(module_path)
+        self.save_meta(module["download_url"], response)
+        return module_path
+
+    def submit(self, func, *args):
+        return self.executor.submit(func, *args)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
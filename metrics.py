@@ -0,0 +1,196 @@
+import json
+import math
+import time
+import asyncio
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else math.inf
+        return math.inf
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.sections = {}
+        self.commands_total = 0
+        self.commands_per_second = 0.0
+        self.last_rate_sample = (self.started, 0)
+
+    def histogram(self, name, help_text, label_names):
+        self.histograms[name] = (help_text, label_names, {})
+
+    def counter(self, name, help_text, label_names):
+        self.counters[name] = (help_text, label_names, {})
+
+    def gauge(self, name, help_text, label_names, func):
+        self.gauges[name] = (help_text, label_names, func)
+
+    def section(self, name, func):
+        self.sections[name] = func
+
+    def observe(self, name, labels, value):
+        series = self.histograms[name][2]
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram()
+        histogram.observe(value)
+
+    def inc(self, name, labels=(), amount=1):
+        series = self.counters[name][2]
+        series[labels] = series.get(labels, 0) + amount
+
+    def observe_command(self, module_name, command, elapsed, error=None):
+        self.commands_total += 1
+        self.observe("bc_command_latency_seconds", (module_name, command), elapsed)
+        self.observe("bc_module_latency_seconds", (module_name,), elapsed)
+        self.inc("bc_commands_total", (module_name, command))
+        if error is not None:
+            self.inc("bc_command_errors_total", (module_name, command, error))
+
+    def update_rate(self):
+        now = time.monotonic()
+        last_time, last_total = self.last_rate_sample
+        if now > last_time:
+            rate = (self.commands_total - last_total) / (now - last_time)
+            self.commands_per_second = 0.7 * self.commands_per_second + 0.3 * rate
+        self.last_rate_sample = (now, self.commands_total)
+
+    def gauge_values(self, func):
+        try:
+            value = func()
+        except Exception:
+            return {}
+        return value if isinstance(value, dict) else {(): value}
+
+    def render(self):
+        lines = []
+        for name, (help_text, label_names, series) in self.histograms.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for labels, histogram in list(series.items()):
+                cumulative = 0
+                for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels((*label_names, 'le'), (*labels, bound))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(label_names, labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_labels(label_names, labels)} {histogram.count}")
+        for name, (help_text, label_names, series) in self.counters.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for labels, value in list(series.items()):
+                lines.append(f"{name}{_labels(label_names, labels)} {value}")
+        for name, (help_text, label_names, func) in self.gauges.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for labels, value in self.gauge_values(func).items():
+                lines.append(f"{name}{_labels(label_names, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        commands = {}
+        for (module_name, command), histogram in list(self.histograms["bc_command_latency_seconds"][2].items()):
+            commands[f"{module_name}.{command}"] = {
+                "count": histogram.count,
+                "avg": histogram.sum / histogram.count,
+                "p50": histogram.quantile(0.5),
+                "p99": histogram.quantile(0.99),
+            }
+        errors = sum(self.counters["bc_command_errors_total"][2].values())
+        snapshot = {
+            "uptime": time.monotonic() - self.started,
+            "commands_total": self.commands_total,
+            "commands_per_second": self.commands_per_second,
+            "errors_total": errors,
+            "commands": commands,
+        }
+        for name, (help_text, label_names, func) in self.gauges.items():
+            values = self.gauge_values(func)
+            if () in values:
+                snapshot[name] = values[()]
+            else:
+                snapshot[name] = {",".join(map(str, labels)): value for labels, value in values.items()}
+        for name, func in self.sections.items():
+            try:
+                snapshot[name] = func()
+            except Exception:
+                snapshot[name] = None
+        return snapshot
+
+    async def sample_loop_lag(self, interval=0.5):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - start - interval)
+            self.observe("bc_event_loop_lag_seconds", (), lag)
+            self.update_rate()
+
+    async def handle_http(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            path = parts[1] if len(parts) > 1 else "/"
+            if path == "/metrics":
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4", self.render()
+            elif path == "/snapshot":
+                status, content_type, body = "200 OK", "application/json", json.dumps(self.snapshot(), default=str)
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", "Not Found\n"
+            payload = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(payload)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + payload
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=9108):
+        return await asyncio.start_server(self.handle_http, host, port)
+
+
+def create_metrics():
+    metrics = Metrics()
+    metrics.histogram("bc_command_latency_seconds", "Command dispatch latency.", ("module", "command"))
+    metrics.histogram("bc_module_latency_seconds", "Dispatch latency per module.", ("module",))
+    metrics.histogram("bc_event_loop_lag_seconds", "Event loop scheduling lag.", ())
+    metrics.counter("bc_commands_total", "Commands handled.", ("module", "command"))
+    metrics.counter("bc_command_errors_total", "Commands that failed.", ("module", "command", "error"))
+    metrics.counter("bc_messages_total", "Prefixed messages received.", ("outcome",))
+    return metrics
@@ -0,0 +1,132 @@
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel, pyqtSignal
+
+
+class SearchIndex:
+    def __init__(self):
+        self.haystacks = {}
+        self.last_query = None
+        self.last_result = None
+
+    def update(self, items):
+        self.haystacks = {
+            item["name"]: f"{item['name']} {item.get('description', '')}".lower()
+            for item in items
+        }
+        self.last_query = None
+        self.last_result = None
+
+    def search(self, query):
+        terms = query.lower().split()
+        if not terms:
+            return None
+        query = " ".join(terms)
+        candidates = self.haystacks
+        if self.last_query is not None and query.startswith(self.last_query):
+            candidates = {name: self.haystacks[name] for name in self.last_result}
+        result = {name for name, haystack in candidates.items() if all(term in haystack for term in terms)}
+        self.last_query = query
+        self.last_result = result
+        return result
+
+
+class ModuleListModel(QAbstractListModel):
+    ItemRole = Qt.ItemDataRole.UserRole + 1
+    items_updated = pyqtSignal()
+
+    def __init__(self, checkable=False, parent=None):
+        super().__init__(parent)
+        self.checkable = checkable
+        self.items = []
+        self.rows = {}
+        self.dirty = set()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.items[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if item.get("description"):
+                return f"{item['name']} - {item['description']}"
+            return item["name"]
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return item.get("description")
+        if role == Qt.ItemDataRole.CheckStateRole and self.checkable:
+            return Qt.CheckState.Checked if item.get("enabled") else Qt.CheckState.Unchecked
+        if role == self.ItemRole:
+            return item
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if self.checkable and index.isValid():
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not (self.checkable and index.isValid() and role == Qt.ItemDataRole.CheckStateRole):
+            return False
+        item = self.items[index.row()]
+        item["enabled"] = Qt.CheckState(value) == Qt.CheckState.Checked
+        self.dirty.add(item["name"])
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def item(self, name):
+        row = self.rows.get(name)
+        return None if row is None else self.items[row]
+
+    def mark_saved(self):
+        self.dirty.clear()
+
+    def set_items(self, items):
+        new_items = {item["name"]: item for item in items}
+        self.dirty &= new_items.keys()
+        for row in reversed(range(len(self.items))):
+            if self.items[row]["name"] not in new_items:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.items[row]
+                self.endRemoveRows()
+        self.rows = {item["name"]: row for row, item in enumerate(self.items)}
+        for row, item in enumerate(self.items):
+            new_item = new_items[item["name"]]
+            if item["name"] in self.dirty:
+                new_item["enabled"] = item["enabled"]
+            if new_item != item:
+                self.items[row] = new_item
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+        added = [item for name, item in new_items.items() if name not in self.rows]
+        if added:
+            self.beginInsertRows(QModelIndex(), len(self.items), len(self.items) + len(added) - 1)
+            self.items.extend(added)
+            self.endInsertRows()
+        self.rows = {item["name"]: row for row, item in enumerate(self.items)}
+        self.items_updated.emit()
+
+
+class ModuleFilterModel(QSortFilterProxyModel):
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(source)
+        self.search_index = SearchIndex()
+        self.accepted = None
+        self.query = ""
+        source.items_updated.connect(self.rebuild_index)
+
+    def rebuild_index(self):
+        self.search_index.update(self.sourceModel().items)
+        if self.query:
+            self.set_query(self.query)
+
+    def set_query(self, query):
+        self.query = query
+        self.accepted = self.search_index.search(query)
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.accepted is None:
+            return True
+        return self.sourceModel().items[source_row]["name"] in self.accepted
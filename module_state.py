@@ -0,0 +1,75 @@
+import ast
+import logging
+from settings_store import SettingsStore, write_json_atomic
+
+STATE_FILE_NAME = "modules_state.json"
+LEGACY_FILE_NAME = "on_off_modules.py"
+METADATA_FILE_NAME = "module_metadata.json"
+
+log = logging.getLogger(__name__)
+
+
+def read_legacy_state(path):
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+            and node.targets[0].id == "enabled_modules"
+        ):
+            value = ast.literal_eval(node.value)
+            if isinstance(value, dict):
+                return {str(name): bool(enabled) for name, enabled in value.items()}
+    return {}
+
+
+class ModuleState(SettingsStore):
+    def __init__(self, modules_dir, debounce=0.5):
+        super().__init__(modules_dir / STATE_FILE_NAME, debounce)
+        self.legacy_path = modules_dir / LEGACY_FILE_NAME
+
+    def load(self):
+        if self.data is None and not self.path.exists():
+            self.create()
+        return super().load()
+
+    def create(self):
+        enabled = {}
+        if self.legacy_path.exists():
+            try:
+                enabled = read_legacy_state(self.legacy_path)
+            except (OSError, SyntaxError, ValueError) as e:
+                log.warning("Failed to migrate %s: %s", self.legacy_path.name, e)
+        self.path.parent.mkdir(exist_ok=True)
+        write_json_atomic(self.path, {"enabled": enabled})
+        if self.legacy_path.exists():
+            self.legacy_path.replace(self.legacy_path.with_name(f"{LEGACY_FILE_NAME}.bak"))
+            log.info("Migrated %s to %s", self.legacy_path.name, self.path.name)
+
+    def enabled_modules(self):
+        return self.get("enabled", {})
+
+    def set_enabled(self, enabled):
+        self.set("enabled", dict(enabled))
+
+
+class ModuleMetadata(SettingsStore):
+    def __init__(self, path, debounce=0.5):
+        super().__init__(path, debounce)
+        self.path.parent.mkdir(exist_ok=True)
+
+    def metadata(self, module_name):
+        return self.get("modules", {}).get(module_name)
+
+    def record(self, entries):
+        if not entries:
+            return
+        modules = dict(self.get("modules", {}))
+        modules.update(entries)
+        self.set("modules", modules)
+
+    def forget(self, module_names):
+        modules = self.get("modules", {})
+        if any(module_name in modules for module_name in module_names):
+            self.set("modules", {name: meta for name, meta in modules.items() if name not in module_names})
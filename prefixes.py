@@ -0,0 +1,78 @@
+import json
+import sqlite3
+import threading
+from execution import run_in_thread
+
+
+class PrefixMatcher:
+    __slots__ = ("prefixes", "first_chars")
+
+    def __init__(self, prefixes):
+        self.prefixes = tuple(sorted({prefix for prefix in prefixes if prefix}, key=len, reverse=True))
+        self.first_chars = frozenset(prefix[0] for prefix in self.prefixes)
+
+    def match(self, content):
+        if not content or content[0] not in self.first_chars:
+            return None
+        for prefix in self.prefixes:
+            if content.startswith(prefix):
+                return prefix
+        return None
+
+
+class PrefixStore:
+    def __init__(self, path, default, max_prefixes=5):
+        self.path = path
+        self.max_prefixes = max_prefixes
+        self.lock = threading.Lock()
+        self.set_default(default)
+        path.parent.mkdir(exist_ok=True)
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS guild_prefixes (guild_id INTEGER PRIMARY KEY, prefixes TEXT NOT NULL)")
+        self.db.commit()
+        self.matchers = {
+            guild_id: PrefixMatcher(json.loads(prefixes))
+            for guild_id, prefixes in self.db.execute("SELECT guild_id, prefixes FROM guild_prefixes")
+        }
+
+    def set_default(self, default):
+        self.default = [default] if isinstance(default, str) else list(default)
+        self.default_matcher = PrefixMatcher(self.default)
+
+    def matcher(self, guild_id):
+        return self.matchers.get(guild_id, self.default_matcher)
+
+    def match(self, message):
+        return self.matcher(message.guild.id if message.guild else None).match(message.content)
+
+    def get(self, guild_id):
+        return list(self.matcher(guild_id).prefixes)
+
+    def command_prefix(self, bot, message):
+        return self.get(message.guild.id if message.guild else None)
+
+    def write(self, guild_id, prefixes):
+        with self.lock, self.db:
+            if prefixes is None:
+                self.db.execute("DELETE FROM guild_prefixes WHERE guild_id = ?", (guild_id,))
+            else:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO guild_prefixes (guild_id, prefixes) VALUES (?, ?)",
+                    (guild_id, json.dumps(prefixes))
+                )
+
+    async def set(self, guild_id, prefixes):
+        prefixes = [prefix for prefix in dict.fromkeys(prefixes) if prefix][:self.max_prefixes]
+        if not prefixes:
+            raise ValueError("At least one prefix is required")
+        await run_in_thread(self.write, guild_id, prefixes)
+        self.matchers[guild_id] = PrefixMatcher(prefixes)
+        return prefixes
+
+    async def reset(self, guild_id):
+        await run_in_thread(self.write, guild_id, None)
+        self.matchers.pop(guild_id, None)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,90 @@
+import inspect
+import logging
+from collections import namedtuple
+
+COMMANDS_ATTRIBUTE = "bc_commands"
+
+CommandEntry = namedtuple("CommandEntry", ["name", "module_name", "handler", "target"], defaults=(None,))
+
+log = logging.getLogger(__name__)
+
+
+def _declared_handlers(module):
+    declared = getattr(module, COMMANDS_ATTRIBUTE, None)
+    if declared is None:
+        return None
+    if isinstance(declared, dict) and all(
+        isinstance(name, str) and inspect.iscoroutinefunction(handler) for name, handler in declared.items()
+    ):
+        return [(name, lambda command, message, h=handler: h(message)) for name, handler in declared.items()]
+    if (
+        isinstance(declared, (list, tuple))
+        and all(isinstance(name, str) for name in declared)
+        and inspect.iscoroutinefunction(getattr(module, "execute_command", None))
+    ):
+        return [(name, module.execute_command) for name in declared]
+    log.warning(
+        "Module %s has an invalid %s declaration, expected a list of names with execute_command "
+        "or a dict of names to async handlers", module.__name__, COMMANDS_ATTRIBUTE
+    )
+    return None
+
+
+class CommandRegistry:
+    def __init__(self):
+        self.commands = {}
+        self.fallback = {}
+        self.collisions = []
+
+    def register(self, name, handler, module_name, target=None):
+        name = name.lower()
+        existing = self.commands.get(name)
+        if existing is not None and existing.module_name != module_name:
+            self.collisions.append((name, existing.module_name, module_name))
+            return False
+        self.commands[name] = CommandEntry(name, module_name, handler, target or name)
+        return True
+
+    def register_alias(self, alias, target, module_name):
+        entry = self.commands.get(target.lower())
+        if entry is None or entry.module_name != module_name:
+            return False
+        return self.register(alias, entry.handler, module_name, entry.target)
+
+    def register_module(self, module_name, module):
+        handlers = _declared_handlers(module)
+        if handlers is None:
+            if inspect.iscoroutinefunction(getattr(module, "execute_command", None)):
+                self.fallback[module_name] = module
+            return
+        for name, handler in handlers:
+            self.register(name, handler, module_name)
+        aliases = getattr(module, "aliases", {})
+        if isinstance(aliases, dict):
+            for alias, target in aliases.items():
+                self.register_alias(alias, target, module_name)
+
+    def unregister_module(self, module_name):
+        self.commands = {name: entry for name, entry in self.commands.items() if entry.module_name != module_name}
+        self.fallback.pop(module_name, None)
+
+    def lookup(self, command):
+        return self.commands.get(command)
+
+    async def dispatch(self, command, message):
+        entry = self.commands.get(command)
+        if entry is not None:
+            result = await entry.handler(command, message)
+            if result is not None:
+                return result
+        for module in self.fallback.values():
+            result = await module.execute_command(command, message)
+            if result is not None:
+                return result
+        return None
+
+    def collision_report(self):
+        return [
+            f"Command `{name}` from module {loser} ignored, already registered by {owner}"
+            for name, owner, loser in self.collisions
+        ]
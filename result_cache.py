@@ -0,0 +1,114 @@
+import time
+import logging
+from collections import OrderedDict
+
+SCOPES = ("global", "guild", "channel", "user")
+
+log = logging.getLogger(__name__)
+_cache = None
+
+
+def _scope_id(scope, message):
+    if scope == "guild":
+        return message.guild.id if message.guild else None
+    if scope == "channel":
+        return message.channel.id
+    if scope == "user":
+        return message.author.id
+    return None
+
+
+class ResultCache:
+    def __init__(self, modules, max_size=1024, default_ttl=60):
+        self.modules = modules
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalid = set()
+
+    def policy(self, module_name, command):
+        module = self.modules.get(module_name)
+        if module is None:
+            return None
+        policies = getattr(module, "cache_policy", None)
+        if not isinstance(policies, dict):
+            return None
+        policy = policies.get(command)
+        if policy is True:
+            return {}
+        if not isinstance(policy, dict):
+            return None
+        ttl = policy.get("ttl", self.default_ttl)
+        if (
+            isinstance(ttl, bool) or not isinstance(ttl, (int, float)) or ttl <= 0
+            or policy.get("scope", "global") not in SCOPES
+        ):
+            if (module_name, command) not in self.invalid:
+                self.invalid.add((module_name, command))
+                log.warning(
+                    "Module %s has an invalid cache_policy for %s, expected a positive ttl and a scope of %s",
+                    module_name, command, ", ".join(SCOPES)
+                )
+            return None
+        return policy
+
+    def key_for(self, entry, args, message):
+        if entry is None:
+            return None, None
+        policy = self.policy(entry.module_name, entry.target)
+        if policy is None:
+            return None, None
+        scope = policy.get("scope", "global")
+        key = (entry.module_name, entry.target, " ".join(args), scope, _scope_id(scope, message))
+        return key, policy.get("ttl", self.default_ttl)
+
+    def get(self, key):
+        item = self.entries.get(key)
+        if item is None or item[0] <= time.monotonic():
+            if item is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def put(self, key, result, ttl):
+        self.entries[key] = (time.monotonic() + ttl, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, module_name=None, command=None, scope_id=None):
+        for key in list(self.entries):
+            if module_name is not None and key[0] != module_name:
+                continue
+            if command is not None and key[1] != command:
+                continue
+            if scope_id is not None and key[4] != scope_id:
+                continue
+            del self.entries[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def set_cache(cache):
+    global _cache
+    _cache = cache
+
+
+def invalidate(module_name=None, command=None, scope_id=None):
+    if _cache is not None:
+        _cache.invalidate(module_name, command, scope_id)
@@ -0,0 +1,400 @@
+import os
+from pathlib import Path
+import disnake
+from disnake.ext import commands
+import sys
+import math
+import logging
+import time
+import asyncio
+import argparse
+from registry import CommandRegistry
+from loader import ModuleManager
+from execution import CommandTimeoutError, Executor, set_executor
+from sender import SendQueue
+from intents import intents_report, resolve_intents
+from cluster import ClusterLauncher
+from throttle import Throttler
+from result_cache import ResultCache, set_cache
+from metrics import create_metrics
+from settings_store import SettingsStore
+from stall_watchdog import StallWatchdog
+from supervisor import SupervisorClient
+from prefixes import PrefixStore
+from storage import Storage, set_storage
+from logs import apply_levels, command_context, sampler, setup_logging, stop_logging
+
+if getattr(sys, 'frozen', False):
+    BASE_DIR = Path(sys.executable).resolve().parent
+else:
+    BASE_DIR = Path(__file__).resolve().parent
+
+MODULES_DIR = BASE_DIR / "modules"
+DATA_DIR = BASE_DIR / "data"
+LOGS_DIR = BASE_DIR / "logs"
+SETTINGS_FILE = BASE_DIR / "settings.json"
+
+settings_store = SettingsStore(SETTINGS_FILE)
+
+def load_settings():
+    if not os.path.exists(SETTINGS_FILE):
+        raise FileNotFoundError("Settings file settings.json not found!")
+    settings = settings_store.load()
+    if "bot_token" not in settings or not settings["bot_token"]:
+        raise ValueError("Bot token not specified or invalid in settings.json!")
+    return settings
+
+def load_modules():
+    return module_manager.load_all()
+
+def parse_cluster_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cluster-id", type=int)
+    parser.add_argument("--shard-ids")
+    parser.add_argument("--shard-count", type=int)
+    parser.add_argument("--identify-delay", type=float, default=0.0)
+    args, _ = parser.parse_known_args()
+    return args
+
+def create_bot(**options):
+    sharding = settings.get("sharding", {})
+    if cluster_args.shard_ids:
+        return commands.AutoShardedBot(
+            shard_ids=[int(shard_id) for shard_id in cluster_args.shard_ids.split(",")],
+            shard_count=cluster_args.shard_count,
+            **options
+        )
+    if sharding.get("auto_shard", False):
+        return commands.AutoShardedBot(shard_count=sharding.get("shard_count"), **options)
+    return commands.Bot(**options)
+
+settings = load_settings()
+cluster_args = parse_cluster_args()
+setup_logging(
+    settings.get("log_level", "INFO"),
+    settings.get("logging", {}),
+    LOGS_DIR / ("bot.log" if cluster_args.cluster_id is None else f"bot-{cluster_args.cluster_id}.log")
+)
+log = logging.getLogger("bot")
+command_log = logging.getLogger("bot.commands")
+command_sampler = sampler("commands")
+throttle_sampler = sampler("throttled")
+registry = CommandRegistry()
+prefix_settings = settings.get("guild_prefixes", {})
+prefix_store = PrefixStore(
+    DATA_DIR / "guild_prefixes.db",
+    settings["bot_prefix"],
+    max_prefixes=prefix_settings.get("max_prefixes", 5)
+)
+storage_settings = settings.get("storage", {})
+storage = Storage(
+    DATA_DIR / "storage.db",
+    batch_size=storage_settings.get("batch_size", 500),
+    flush_interval=storage_settings.get("flush_interval", 0.05),
+    cache_size=storage_settings.get("cache_size", 4096) if cluster_args.cluster_id is None else 0
+)
+set_storage(storage)
+module_manager = ModuleManager(
+    registry, MODULES_DIR, DATA_DIR / "module_metadata.json", settings.get("lazy_modules", False)
+)
+intents, member_cache_flags, intent_sources = resolve_intents(
+    module_manager.enabled_manifests(),
+    settings.get("intents", "auto"),
+    settings.get("extra_intents", [])
+)
+bot = create_bot(
+    command_prefix=prefix_store.command_prefix,
+    intents=intents,
+    member_cache_flags=member_cache_flags,
+    help_command=None
+)
+bot.command_registry = registry
+module_manager.bot = bot
+modules = load_modules()
+
+async def prefix_command(command, message):
+    if message.guild is None:
+        return "Prefixes can only be changed in a server."
+    args = message.content[len(prefix_store.match(message) or ""):].split()[1:]
+    if not args:
+        return f"Prefixes for this server: {' '.join(f'`{prefix}`' for prefix in prefix_store.get(message.guild.id))}"
+    if not message.author.guild_permissions.manage_guild:
+        return "You need the Manage Server permission to change prefixes."
+    if args == ["reset"]:
+        await prefix_store.reset(message.guild.id)
+        return f"Prefixes reset to {' '.join(f'`{prefix}`' for prefix in prefix_store.default)}"
+    prefixes = await prefix_store.set(message.guild.id, args)
+    return f"Prefixes set to {' '.join(f'`{prefix}`' for prefix in prefixes)}"
+
+if prefix_settings.get("command", "prefix"):
+    registry.register(prefix_settings.get("command", "prefix"), prefix_command, "core")
+
+for line in intents_report(intents, member_cache_flags, intent_sources):
+    log.info(line)
+executor = Executor(
+    modules,
+    BASE_DIR,
+    timeout=settings.get("command_timeout", 30),
+    max_concurrency=settings.get("module_concurrency", 4)
+)
+set_executor(executor)
+send_settings = settings.get("send_queue", {})
+send_queue = SendQueue(
+    rate=send_settings.get("channel_rate", 5),
+    per=send_settings.get("channel_per", 5.0),
+    coalesce=send_settings.get("coalesce", True),
+    dedupe_window=send_settings.get("dedupe_window", 5.0)
+)
+throttler = Throttler(settings.get("rate_limits", {}))
+cache_settings = settings.get("result_cache", {})
+result_cache = ResultCache(
+    modules,
+    max_size=cache_settings.get("max_size", 1024),
+    default_ttl=cache_settings.get("default_ttl", 60)
+)
+set_cache(result_cache)
+module_manager.unload_hooks.append(result_cache.invalidate)
+metrics_settings = settings.get("metrics", {})
+metrics = create_metrics()
+executor.metrics = metrics
+metrics.gauge("bc_gateway_latency_seconds", "Gateway heartbeat latency.", ("shard",),
+              lambda: {(str(shard_id),): latency for shard_id, latency in getattr(bot, "latencies", [(0, bot.latency)])})
+metrics.gauge("bc_guilds", "Guilds the bot is in.", (), lambda: len(bot.guilds))
+metrics.gauge("bc_send_queue_depth", "Replies waiting in the send queue.", (), send_queue.depth)
+metrics.gauge("bc_send_queue", "Send queue counters and latency.", ("stat",),
+              lambda: {(name,): value for name, value in send_queue.stats().items()})
+metrics.gauge("bc_result_cache", "Result cache counters.", ("stat",),
+              lambda: {(name,): value for name, value in result_cache.stats().items()})
+metrics.gauge("bc_storage", "Module storage counters.", ("stat",),
+              lambda: {(name,): value for name, value in storage.stats().items()})
+metrics.gauge("bc_throttled_total", "Messages rejected by the throttler.", (), lambda: throttler.throttled)
+metrics_tasks = []
+watchdog_settings = settings.get("watchdog", {})
+watchdog = StallWatchdog(
+    MODULES_DIR,
+    executor.active,
+    threshold=watchdog_settings.get("threshold", 0.25),
+    interval=watchdog_settings.get("interval", 0.1)
+)
+metrics.gauge("bc_loop_blocked_seconds", "Time the event loop was blocked, by module.", ("module",),
+              lambda: {(module_name,): seconds for module_name, seconds in watchdog.blocked.items()})
+metrics.gauge("bc_loop_stalls_total", "Event loop stalls detected.", (), lambda: watchdog.stall_count)
+metrics.section("loop_stalls", lambda: [
+    {key: value for key, value in stall.items() if key != "since"} for stall in list(watchdog.stalls)
+])
+
+for line in module_manager.timeline.report():
+    log.info(line)
+
+for line in registry.collision_report():
+    log.warning(line)
+
+async def update_activity():
+    settings = settings_store.load()
+    activity_list = settings.get("activity_list", [])
+    interval = settings.get("activity_interval", 30)
+    if not activity_list or interval == 0:
+        if activity_list:
+            activity_type = {
+                "playing": disnake.ActivityType.playing,
+                "listening": disnake.ActivityType.listening,
+                "watching": disnake.ActivityType.watching
+            }.get(activity_list[0]["type"], disnake.ActivityType.playing)
+            await bot.change_presence(activity=disnake.Activity(type=activity_type, name=activity_list[0]["text"]))
+        return
+    
+    while True:
+        for activity in activity_list:
+            activity_type = {
+                "playing": disnake.ActivityType.playing,
+                "listening": disnake.ActivityType.listening,
+                "watching": disnake.ActivityType.watching
+            }.get(activity["type"], disnake.ActivityType.playing)
+            await bot.change_presence(activity=disnake.Activity(type=activity_type, name=activity["text"]))
+            await asyncio.sleep(interval)
+
+activity_tasks = []
+
+def restart_activity():
+    for task in activity_tasks:
+        task.cancel()
+    activity_tasks[:] = [asyncio.create_task(update_activity())]
+
+def on_settings_changed(changed, new_settings):
+    if "bot_prefix" in changed and new_settings.get("bot_prefix"):
+        prefix_store.set_default(new_settings["bot_prefix"])
+        log.info("Prefix changed to %s", new_settings["bot_prefix"])
+    if changed & {"log_level", "logging"}:
+        apply_levels(new_settings.get("log_level", "INFO"), new_settings.get("logging", {}).get("levels", {}))
+        log.info("Log level changed to %s", new_settings.get("log_level", "INFO"))
+    if activity_tasks and changed & {"activity_list", "activity_interval"}:
+        restart_activity()
+
+settings_store.subscribe(on_settings_changed)
+
+@bot.event
+async def on_ready():
+    if cluster_args.cluster_id is not None:
+        log.info("Bot %s cluster %s (shards %s) successfully started!", bot.user, cluster_args.cluster_id, cluster_args.shard_ids)
+    else:
+        log.info("Bot %s successfully started!", bot.user)
+    if not activity_tasks:
+        restart_activity()
+        asyncio.create_task(settings_store.watch(settings.get("settings_reload_interval", 1)))
+    module_manager.start_watching(settings.get("hot_reload_interval", 2))
+    if watchdog_settings.get("enabled", True):
+        watchdog.start()
+    if not metrics_tasks:
+        metrics_tasks.append(asyncio.create_task(metrics.sample_loop_lag(metrics_settings.get("loop_lag_interval", 0.5))))
+        if metrics_settings.get("http", False):
+            host = metrics_settings.get("host", "127.0.0.1")
+            port = metrics_settings.get("port", 9108) + (cluster_args.cluster_id or 0)
+            try:
+                metrics_tasks.append(await metrics.serve(host, port))
+                log.info("Metrics available at http://%s:%s/metrics", host, port)
+            except OSError as e:
+                log.error("Failed to start metrics endpoint: %s", e)
+
+draining = asyncio.Event()
+
+def supervisor_stats():
+    return {
+        "cluster_id": cluster_args.cluster_id,
+        "guilds": len(bot.guilds),
+        "latency": bot.latency if math.isfinite(bot.latency) else None,
+        "commands_per_second": metrics.commands_per_second,
+        "commands_total": metrics.commands_total,
+        "active_commands": len(executor.active),
+        "send_queue_depth": send_queue.depth(),
+        "loop_stalls": watchdog.stall_count,
+        "draining": draining.is_set(),
+    }
+
+async def drain(timeout):
+    if draining.is_set():
+        return
+    draining.set()
+    log.info("Draining %d running commands before shutdown", len(executor.active))
+    deadline = time.monotonic() + timeout
+    while (executor.active or send_queue.depth()) and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    await bot.close()
+
+@bot.event
+async def on_message(message):
+    if message.author == bot.user or draining.is_set():
+        return
+    prefix = prefix_store.match(message)
+    if prefix is None:
+        return
+    args = message.content[len(prefix):].split()
+    if not args:
+        return
+    command = args[0].lower()
+    args = args[1:]
+
+    retry_after = throttler.check(message.author.id, message.guild.id if message.guild else None, command)
+    if retry_after:
+        if throttler.should_notify(message.author.id):
+            embed = disnake.Embed(
+                title="Slow Down",
+                description=f"You are sending commands too fast. Try again in {retry_after:.1f} seconds.",
+                color=disnake.Color.orange()
+            )
+            send_queue.send(message.channel, embed=embed)
+        metrics.inc("bc_messages_total", ("throttled",))
+        if command_log.isEnabledFor(logging.DEBUG) and throttle_sampler():
+            command_log.debug("Throttled for %.1fs", retry_after, extra=command_context(message, command=command))
+        return
+
+    start = time.perf_counter()
+    try:
+        cache_key, cache_ttl = result_cache.key_for(registry.lookup(command), args, message)
+        result = result_cache.get(cache_key) if cache_key else None
+        if result is not None:
+            metrics.inc("bc_messages_total", ("cached",))
+        else:
+            result = await executor.dispatch(registry, command, message)
+            if cache_key and result is not None:
+                result_cache.put(cache_key, result, cache_ttl)
+    except CommandTimeoutError as e:
+        log.warning("Command timed out after %ss", e.timeout, extra=command_context(message, e.module_name, command))
+        embed = disnake.Embed(
+            title="Command Timed Out",
+            description=f"The command `{command}` took longer than {e.timeout} seconds and was cancelled.",
+            color=disnake.Color.orange()
+        )
+        send_queue.send(message.channel, embed=embed)
+        metrics.inc("bc_messages_total", ("timeout",))
+        return
+    except Exception:
+        log.exception("Command failed", extra=command_context(message, command=command, latency=time.perf_counter() - start))
+        metrics.inc("bc_messages_total", ("error",))
+        return
+    if result is not None:
+        if isinstance(result, disnake.Embed):
+            send_queue.send(message.channel, embed=result)
+        else:
+            send_queue.send(message.channel, result)
+        metrics.inc("bc_messages_total", ("handled",))
+        if command_log.isEnabledFor(logging.DEBUG) and command_sampler():
+            entry = registry.lookup(command)
+            command_log.debug("Command handled", extra=command_context(
+                message, entry.module_name if entry else None, command, time.perf_counter() - start
+            ))
+        return
+    metrics.inc("bc_messages_total", ("not_found",))
+    embed = disnake.Embed(
+        title="Command Not Found",
+        description=f"The command `{command}` is not recognized.",
+        color=disnake.Color.red()
+    )
+    send_queue.send(message.channel, embed=embed, dedupe_key=(message.channel.id, message.author.id, "not_found"))
+
+def start_cluster():
+    command = [sys.executable] if getattr(sys, 'frozen', False) else [sys.executable, str(BASE_DIR / "bot.py")]
+    launcher = ClusterLauncher(command)
+    try:
+        count = launcher.start(settings["bot_token"], settings.get("sharding", {}))
+        log.info("Cluster started with %d processes", count)
+        launcher.wait()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        log.exception("Cluster start error: %s", e)
+    finally:
+        launcher.stop()
+        prefix_store.close()
+        storage.close()
+        stop_logging()
+
+def start_bot():
+    if cluster_args.cluster_id is None and settings.get("sharding", {}).get("clusters", 1) > 1:
+        start_cluster()
+        return
+    supervisor_client = SupervisorClient.from_env(
+        cluster_args.cluster_id,
+        settings.get("supervisor", {}).get("heartbeat_interval", 2.0)
+    )
+    if supervisor_client is not None:
+        bot.loop.create_task(supervisor_client.run(supervisor_stats, drain))
+    exit_code = 0
+    try:
+        if cluster_args.identify_delay:
+            bot.loop.run_until_complete(asyncio.sleep(cluster_args.identify_delay))
+        bot.run(settings["bot_token"])
+    except disnake.LoginFailure as e:
+        log.error("Bot login failed: %s", e)
+    except Exception as e:
+        log.exception("Bot start error: %s", e)
+        exit_code = 1
+    finally:
+        executor.shutdown()
+        module_manager.module_metadata.flush()
+        prefix_store.close()
+        storage.close()
+        if watchdog.stall_count:
+            for line in watchdog.report():
+                log.info(line)
+        stop_logging()
+    sys.exit(exit_code)
\ No newline at end of file
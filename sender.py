@@ -0,0 +1,154 @@
+import time
+import asyncio
+import logging
+from collections import deque
+import disnake
+
+MAX_CONTENT_LENGTH = 2000
+MAX_EMBEDS = 10
+MAX_EMBEDS_LENGTH = 6000
+
+log = logging.getLogger(__name__)
+
+
+class ChannelQueue:
+    def __init__(self, channel):
+        self.channel = channel
+        self.items = deque()
+        self.sent_at = deque()
+        self.task = None
+
+
+class SendQueue:
+    def __init__(self, rate=5, per=5.0, global_rate=50, global_per=1.0, coalesce=True, dedupe_window=5.0,
+                 max_idle_channels=1000):
+        self.rate = rate
+        self.per = per
+        self.global_rate = global_rate
+        self.global_per = global_per
+        self.coalesce = coalesce
+        self.dedupe_window = dedupe_window
+        self.max_idle_channels = max_idle_channels
+        self.channels = {}
+        self.global_sent_at = deque()
+        self.recent = {}
+        self.latencies = deque(maxlen=1000)
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def send(self, channel, content=None, embed=None, dedupe_key=None):
+        now = time.monotonic()
+        if dedupe_key is not None:
+            if now - self.recent.get(dedupe_key, float("-inf")) < self.dedupe_window:
+                self.dropped += 1
+                return False
+            self.recent[dedupe_key] = now
+            if len(self.recent) > self.max_idle_channels:
+                self.recent = {key: at for key, at in self.recent.items() if now - at < self.dedupe_window}
+        queue = self.channels.get(channel.id)
+        if queue is None:
+            if len(self.channels) >= self.max_idle_channels:
+                self.prune(now)
+            queue = self.channels[channel.id] = ChannelQueue(channel)
+        queue.items.append((time.perf_counter(), content, embed))
+        if queue.task is None:
+            queue.task = asyncio.create_task(self.drain(queue))
+        return True
+
+    def prune(self, now):
+        for channel_id, queue in list(self.channels.items()):
+            if queue.task is None and (not queue.sent_at or now - queue.sent_at[-1] >= self.per):
+                del self.channels[channel_id]
+
+    async def wait_for_slot(self, sent_at, rate, per):
+        while len(sent_at) >= rate:
+            delay = per - (time.monotonic() - sent_at[0])
+            if delay <= 0:
+                sent_at.popleft()
+            else:
+                await asyncio.sleep(delay)
+
+    def take_batch(self, queue):
+        item = queue.items.popleft()
+        _, content, embed = item
+        batch = [item]
+        if not self.coalesce:
+            return batch, {"content": content, "embed": embed}
+        if embed is not None:
+            embeds = [embed]
+            length = len(embed)
+            while queue.items and queue.items[0][1] is None and queue.items[0][2] is not None and len(embeds) < MAX_EMBEDS:
+                next_embed = queue.items[0][2]
+                if length + len(next_embed) > MAX_EMBEDS_LENGTH:
+                    break
+                batch.append(queue.items.popleft())
+                embeds.append(next_embed)
+                length += len(next_embed)
+            return batch, {"content": content, "embeds": embeds}
+        lines = [str(content)]
+        length = len(lines[0])
+        while queue.items and queue.items[0][2] is None:
+            next_content = str(queue.items[0][1])
+            if length + 1 + len(next_content) > MAX_CONTENT_LENGTH:
+                break
+            batch.append(queue.items.popleft())
+            lines.append(next_content)
+            length += 1 + len(next_content)
+        return batch, {"content": "\n".join(lines)}
+
+    async def deliver(self, queue, batch, kwargs):
+        await self.wait_for_slot(queue.sent_at, self.rate, self.per)
+        await self.wait_for_slot(self.global_sent_at, self.global_rate, self.global_per)
+        now = time.monotonic()
+        queue.sent_at.append(now)
+        self.global_sent_at.append(now)
+        try:
+            await queue.channel.send(**kwargs)
+        except (disnake.HTTPException, disnake.ClientException) as e:
+            return e
+        sent = time.perf_counter()
+        self.sent += 1
+        self.coalesced += len(batch) - 1
+        self.latencies.extend(sent - enqueued_at for enqueued_at, _, _ in batch)
+        return None
+
+    async def drain(self, queue):
+        try:
+            while queue.items:
+                batch, kwargs = self.take_batch(queue)
+                error = await self.deliver(queue, batch, kwargs)
+                if error is None:
+                    continue
+                if len(batch) > 1:
+                    log.warning(
+                        "Failed to send %d coalesced messages, sending them one by one: %s", len(batch), error,
+                        extra={"channel": queue.channel.id}
+                    )
+                    for item in batch:
+                        error = await self.deliver(queue, [item], {"content": item[1], "embed": item[2]})
+                        if error is not None:
+                            self.failed += 1
+                            log.warning("Failed to send message: %s", error, extra={"channel": queue.channel.id})
+                else:
+                    self.failed += 1
+                    log.warning("Failed to send message: %s", error, extra={"channel": queue.channel.id})
+        finally:
+            queue.task = None
+
+    def depth(self):
+        return sum(len(queue.items) for queue in self.channels.values())
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        return {
+            "queue_depth": self.depth(),
+            "channels": len(self.channels),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "latency_p50": latencies[len(latencies) // 2] if latencies else 0.0,
+            "latency_max": latencies[-1] if latencies else 0.0,
+        }
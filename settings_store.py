@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import tempfile
+import threading
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+def write_json_atomic(path, data, retries=5):
+    path = Path(path)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(retries):
+            try:
+                os.replace(temp_path, path)
+                return
+            except PermissionError:
+                if attempt == retries - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class SettingsStore:
+    def __init__(self, path, debounce=0.5):
+        self.path = Path(path)
+        self.debounce = debounce
+        self.data = None
+        self.stat_key = None
+        self.pending = False
+        self.timer = None
+        self.listeners = []
+        self.lock = threading.RLock()
+
+    def load(self):
+        with self.lock:
+            if self.pending:
+                return self.data
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                if self.data is None:
+                    self.data = {}
+                return self.data
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+            if self.data is not None and stat_key == self.stat_key:
+                return self.data
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            old, self.data, self.stat_key = self.data, data, stat_key
+        if old is not None:
+            self.notify(old, data)
+        return data
+
+    def get(self, key, default=None):
+        return self.load().get(key, default)
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, values):
+        with self.lock:
+            data = self.load()
+            changed = {key: value for key, value in values.items() if data.get(key) != value}
+            if not changed:
+                return
+            old = dict(data)
+            data.update(changed)
+            self.pending = True
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = threading.Timer(self.debounce, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+        self.notify(old, data)
+
+    def flush(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.pending:
+                return
+            write_json_atomic(self.path, self.data)
+            stat = os.stat(self.path)
+            self.stat_key = (stat.st_mtime_ns, stat.st_size)
+            self.pending = False
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+
+    def notify(self, old, new):
+        changed = {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+        if not changed:
+            return
+        for callback in self.listeners:
+            try:
+                callback(changed, new)
+            except Exception as e:
+                log.exception("Settings listener error: %s", e)
+
+    async def watch(self, interval=1.0):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.load()
+            except (OSError, ValueError) as e:
+                log.error("Failed to reload settings: %s", e)
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+
+class StallWatchdog:
+    def __init__(self, modules_dir, active, threshold=0.25, interval=0.1, history=50):
+        self.modules_dir = os.path.join(str(modules_dir), "")
+        self.active = active
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = deque(maxlen=history)
+        self.blocked = {}
+        self.stall_count = 0
+        self.heartbeat = time.monotonic()
+        self.current = None
+        self.loop = None
+        self.loop_thread_id = None
+        self.thread = None
+
+    async def beat(self):
+        while True:
+            self.heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        asyncio.create_task(self.beat())
+        self.thread = threading.Thread(target=self.run, name="bc-watchdog", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            heartbeat = self.heartbeat
+            lag = time.monotonic() - heartbeat - self.interval
+            if lag > self.threshold:
+                if self.current is None:
+                    self.current = self.capture(heartbeat)
+            elif self.current is not None:
+                self.current["duration"] = max(0.0, heartbeat - self.current["since"] - self.interval)
+                self.finish(self.current)
+                self.current = None
+
+    def capture(self, heartbeat):
+        frame = sys._current_frames().get(self.loop_thread_id)
+        stack = traceback.extract_stack(frame) if frame is not None else []
+        module_name = "core"
+        for frame_summary in reversed(stack):
+            if frame_summary.filename.startswith(self.modules_dir):
+                module_name = os.path.splitext(os.path.basename(frame_summary.filename))[0]
+                break
+        task = asyncio.current_task(self.loop)
+        command = self.active.get(task, (None, None))[1]
+        return {
+            "at": time.time(),
+            "since": heartbeat,
+            "module": module_name,
+            "command": command,
+            "duration": 0.0,
+            "stack": "".join(traceback.format_list(stack[-8:])),
+        }
+
+    def finish(self, stall):
+        self.stall_count += 1
+        self.blocked[stall["module"]] = self.blocked.get(stall["module"], 0.0) + stall["duration"]
+        self.stalls.append(stall)
+        log.warning(
+            "Event loop blocked for %.3fs:\n%s", stall["duration"], stall["stack"],
+            extra={"module_name": stall["module"], "command": stall["command"]}
+        )
+
+    def report(self):
+        lines = [f"Event loop stalls: {self.stall_count}"]
+        for module_name, seconds in sorted(self.blocked.items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"  {module_name:<30} {seconds:>9.3f} s blocked")
+        return lines
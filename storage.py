@@ -0,0 +1,222 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from execution import run_in_thread
+
+log = logging.getLogger(__name__)
+_storage = None
+_DELETED = object()
+
+
+class Namespace:
+    def __init__(self, storage, namespace, collection=""):
+        self.storage = storage
+        self.namespace = namespace
+        self.collection = collection
+
+    async def get(self, key, default=None):
+        return await self.storage.get((self.namespace, self.collection, str(key)), default)
+
+    def set(self, key, value):
+        self.storage.set((self.namespace, self.collection, str(key)), value)
+
+    def delete(self, key):
+        self.storage.set((self.namespace, self.collection, str(key)), _DELETED)
+
+    async def keys(self, prefix=""):
+        return [key for key, _ in await self.storage.scan(self.namespace, self.collection, prefix)]
+
+    async def items(self, prefix=""):
+        return await self.storage.scan(self.namespace, self.collection, prefix)
+
+    def table(self, name):
+        return Namespace(self.storage, self.namespace, name)
+
+    async def flush(self, timeout=10):
+        return await self.storage.flush(timeout)
+
+
+class Storage:
+    def __init__(self, path, batch_size=500, flush_interval=0.05, cache_size=4096):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.writing = {}
+        self.closing = False
+        self.condition = threading.Condition()
+        self.local = threading.local()
+        self.readers = []
+        self.reads = 0
+        self.cache_hits = 0
+        self.batches = 0
+        self.rows_written = 0
+        self.write_errors = 0
+        self.last_batch_seconds = 0.0
+        path.parent.mkdir(exist_ok=True)
+        db = self.connect()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (namespace TEXT NOT NULL, collection TEXT NOT NULL, "
+            "key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (namespace, collection, key)) WITHOUT ROWID"
+        )
+        db.commit()
+        db.close()
+        self.writer = threading.Thread(target=self.write_loop, name="bc-storage-writer", daemon=True)
+        self.writer.start()
+
+    def connect(self):
+        db = sqlite3.connect(str(self.path), check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def reader(self):
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = self.local.db = self.connect()
+            self.readers.append(db)
+        return db
+
+    def for_module(self, module_name):
+        return Namespace(self, module_name)
+
+    def remember(self, entry, value):
+        if not self.cache_size:
+            return
+        self.cache[entry] = value
+        self.cache.move_to_end(entry)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def unwritten(self, entry):
+        with self.condition:
+            if entry in self.pending:
+                return self.pending[entry]
+            return self.writing.get(entry)
+
+    async def get(self, entry, default=None):
+        value = self.cache.get(entry)
+        if value is not None:
+            self.cache_hits += 1
+            self.cache.move_to_end(entry)
+        else:
+            value = self.unwritten(entry)
+            if value is None:
+                self.reads += 1
+                value = await run_in_thread(self.read, entry)
+                newer = self.cache.get(entry) or self.unwritten(entry)
+                if newer is None:
+                    self.remember(entry, value)
+                else:
+                    value = newer
+        return default if value is _DELETED else json.loads(value)
+
+    def read(self, entry):
+        row = self.reader().execute(
+            "SELECT value FROM entries WHERE namespace = ? AND collection = ? AND key = ?", entry
+        ).fetchone()
+        return row[0] if row else _DELETED
+
+    async def scan(self, namespace, collection, prefix=""):
+        self.reads += 1
+        rows = dict(await run_in_thread(self.read_range, namespace, collection, prefix))
+        with self.condition:
+            unwritten = {**self.writing, **self.pending}
+        for (entry_namespace, entry_collection, key), value in unwritten.items():
+            if entry_namespace == namespace and entry_collection == collection and key.startswith(prefix):
+                rows[key] = value
+        return [(key, json.loads(value)) for key, value in sorted(rows.items()) if value is not _DELETED]
+
+    def read_range(self, namespace, collection, prefix):
+        return self.reader().execute(
+            "SELECT key, value FROM entries WHERE namespace = ? AND collection = ? AND substr(key, 1, ?) = ?",
+            (namespace, collection, len(prefix), prefix)
+        ).fetchall()
+
+    def set(self, entry, value):
+        if value is not _DELETED:
+            value = json.dumps(value)
+        self.remember(entry, value)
+        with self.condition:
+            self.pending[entry] = value
+            if len(self.pending) == 1 or len(self.pending) >= self.batch_size:
+                self.condition.notify_all()
+
+    def write_loop(self):
+        db = self.connect()
+        while True:
+            with self.condition:
+                while not self.pending and not self.closing:
+                    self.condition.wait()
+                if not self.pending:
+                    break
+                if len(self.pending) < self.batch_size and not self.closing:
+                    self.condition.wait(self.flush_interval)
+                self.writing, self.pending = self.pending, {}
+            start = time.perf_counter()
+            upserts = [(*entry, value) for entry, value in self.writing.items() if value is not _DELETED]
+            deletes = [entry for entry, value in self.writing.items() if value is _DELETED]
+            try:
+                with db:
+                    db.executemany("INSERT OR REPLACE INTO entries (namespace, collection, key, value) VALUES (?, ?, ?, ?)", upserts)
+                    db.executemany("DELETE FROM entries WHERE namespace = ? AND collection = ? AND key = ?", deletes)
+            except sqlite3.Error as e:
+                log.error("Storage write failed, retrying %d entries: %s", len(self.writing), e)
+                self.write_errors += 1
+                with self.condition:
+                    self.pending = {**self.writing, **self.pending}
+                    self.writing = {}
+                    self.condition.wait(1.0)
+                continue
+            with self.condition:
+                self.batches += 1
+                self.rows_written += len(self.writing)
+                self.last_batch_seconds = time.perf_counter() - start
+                self.writing = {}
+                self.condition.notify_all()
+        db.close()
+
+    def wait_flushed(self, timeout=None):
+        with self.condition:
+            self.condition.notify_all()
+            return self.condition.wait_for(lambda: not self.pending and not self.writing, timeout)
+
+    async def flush(self, timeout=10):
+        flushed = await run_in_thread(self.wait_flushed, timeout)
+        if not flushed:
+            log.warning("Storage flush timed out after %ss with %d entries pending", timeout, len(self.pending) + len(self.writing))
+        return flushed
+
+    def close(self, timeout=10):
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+        self.writer.join(timeout)
+        for db in self.readers:
+            db.close()
+
+    def stats(self):
+        return {
+            "pending": len(self.pending) + len(self.writing),
+            "cache_size": len(self.cache),
+            "cache_hits": self.cache_hits,
+            "reads": self.reads,
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "write_errors": self.write_errors,
+            "last_batch_seconds": self.last_batch_seconds,
+        }
+
+
+def set_storage(storage):
+    global _storage
+    _storage = storage
+
+
+def for_module(module_name):
+    return _storage.for_module(module_name)
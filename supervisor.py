@@ -0,0 +1,304 @@
+import os
+import json
+import time
+import socket
+import asyncio
+import logging
+import secrets
+import threading
+from cluster import ClusterLauncher
+
+PORT_ENV = "BC_SUPERVISOR_PORT"
+TOKEN_ENV = "BC_SUPERVISOR_TOKEN"
+
+log = logging.getLogger(__name__)
+
+
+def encode(message):
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+
+class SupervisorClient:
+    def __init__(self, port, token, cluster_id=None, interval=2.0):
+        self.port = port
+        self.token = token
+        self.cluster_id = cluster_id
+        self.interval = interval
+
+    @classmethod
+    def from_env(cls, cluster_id=None, interval=2.0):
+        port = os.environ.get(PORT_ENV)
+        token = os.environ.get(TOKEN_ENV)
+        if not port or not token:
+            return None
+        return cls(int(port), token, cluster_id, interval)
+
+    async def run(self, stats, drain):
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        except OSError as e:
+            log.error("Failed to connect to supervisor: %s", e)
+            return
+        writer.write(encode({"type": "hello", "token": self.token, "pid": os.getpid(), "cluster_id": self.cluster_id}))
+        listener = asyncio.create_task(self.listen(reader, drain))
+        try:
+            while not listener.done():
+                writer.write(encode({"type": "heartbeat", "stats": stats()}))
+                await writer.drain()
+                await asyncio.wait({listener}, timeout=self.interval)
+        except ConnectionError:
+            pass
+        finally:
+            listener.cancel()
+            writer.close()
+        log.info("Supervisor connection closed")
+
+    async def listen(self, reader, drain):
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            if message.get("type") == "drain":
+                asyncio.create_task(drain(message.get("timeout", 30)))
+
+
+class Worker:
+    def __init__(self, conn, pid, cluster_id):
+        self.conn = conn
+        self.pid = pid
+        self.cluster_id = cluster_id
+        self.last_seen = time.monotonic()
+        self.stats = {}
+
+    def send(self, message):
+        try:
+            self.conn.sendall(encode(message))
+        except OSError:
+            pass
+
+
+class BotSupervisor:
+    def __init__(self, command, hang_timeout=30.0, startup_timeout=120.0, drain_timeout=30.0,
+                 backoff=1.0, max_backoff=60.0, stable_after=60.0):
+        self.command = command
+        self.hang_timeout = hang_timeout
+        self.startup_timeout = startup_timeout
+        self.drain_timeout = drain_timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.token = secrets.token_hex(16)
+        self.server = None
+        self.launcher = None
+        self.workers = {}
+        self.expected = 0
+        self.state = "stopped"
+        self.reason = None
+        self.restarts = 0
+        self.failures = 0
+        self.started_at = None
+        self.next_start = None
+        self.lock = threading.RLock()
+        self.stop_event = threading.Event()
+
+    def start(self, bot_token, sharding):
+        self.bot_token = bot_token
+        self.sharding = sharding
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.started_at = time.monotonic()
+        self.state = "starting"
+        threading.Thread(target=self.accept_loop, name="bc-supervisor-accept", daemon=True).start()
+        threading.Thread(target=self.monitor_loop, name="bc-supervisor", daemon=True).start()
+
+    def env(self):
+        env = dict(os.environ)
+        env[PORT_ENV] = str(self.server.getsockname()[1])
+        env[TOKEN_ENV] = self.token
+        return env
+
+    def launch(self):
+        launcher = ClusterLauncher(self.command, env=self.env())
+        expected = launcher.start(self.bot_token, self.sharding)
+        with self.lock:
+            if not self.stop_event.is_set():
+                self.launcher = launcher
+                self.expected = expected
+                self.started_at = time.monotonic()
+                self.state = "starting"
+                return
+        launcher.stop()
+
+    def accept_loop(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.serve, args=(conn,), daemon=True).start()
+
+    def serve(self, conn):
+        worker = None
+        try:
+            with conn, conn.makefile("r", encoding="utf-8") as lines:
+                hello = json.loads(lines.readline() or "{}")
+                if hello.get("type") != "hello" or not secrets.compare_digest(str(hello.get("token")), self.token):
+                    return
+                worker = Worker(conn, hello.get("pid"), hello.get("cluster_id"))
+                with self.lock:
+                    self.workers[worker.pid] = worker
+                for line in lines:
+                    message = json.loads(line)
+                    if message.get("type") == "heartbeat":
+                        worker.stats = message.get("stats", {})
+                        worker.last_seen = time.monotonic()
+        except (OSError, ValueError):
+            pass
+        finally:
+            if worker is not None:
+                with self.lock:
+                    if self.workers.get(worker.pid) is worker:
+                        del self.workers[worker.pid]
+
+    def monitor_loop(self):
+        try:
+            self.launch()
+        except (OSError, ValueError, KeyError) as e:
+            with self.lock:
+                if self.stop_event.is_set():
+                    return
+                retired = self.finish(f"failed to start: {e}")
+            self.retire(retired)
+            return
+        while not self.stop_event.wait(1.0):
+            try:
+                self.check()
+            except Exception as e:
+                log.exception("Supervisor error: %s", e)
+
+    def check(self):
+        with self.lock:
+            if self.stop_event.is_set():
+                return
+            now = time.monotonic()
+            if self.state == "backoff":
+                relaunch = now >= self.next_start
+                retired = None
+            else:
+                relaunch = False
+                retired = self.check_workers(now)
+        self.retire(retired)
+        if relaunch:
+            try:
+                self.launch()
+            except (OSError, ValueError, KeyError) as e:
+                with self.lock:
+                    retired = self.schedule_restart(f"failed to start: {e}")
+                self.retire(retired)
+
+    def check_workers(self, now):
+        if 0 in self.launcher.exited():
+            return self.finish("exited with code 0")
+        reason = self.failure_reason(now)
+        if reason is not None:
+            return self.schedule_restart(reason)
+        if self.state == "starting" and len(self.workers) >= self.expected:
+            self.state = "running"
+        return None
+
+    def failure_reason(self, now):
+        exited = self.launcher.exited()
+        if exited:
+            return f"exited with code {exited[0]}"
+        for worker in self.workers.values():
+            if now - worker.last_seen > self.hang_timeout:
+                return f"no heartbeat from pid {worker.pid} for {now - worker.last_seen:.0f}s"
+        if len(self.workers) < self.expected and now - self.started_at > self.startup_timeout:
+            return f"not connected after {self.startup_timeout:.0f}s"
+        return None
+
+    def schedule_restart(self, reason):
+        uptime = time.monotonic() - self.started_at if self.state != "backoff" else 0.0
+        self.failures = 1 if uptime >= self.stable_after else self.failures + 1
+        delay = min(self.max_backoff, self.backoff * 2 ** (self.failures - 1))
+        log.warning("Bot %s, restarting in %.0fs", reason, delay)
+        self.disconnect_workers()
+        self.reason = reason
+        self.restarts += 1
+        self.next_start = time.monotonic() + delay
+        self.state = "backoff"
+        return self.detach_launcher()
+
+    def finish(self, reason):
+        log.warning("Bot %s, not restarting", reason)
+        self.stop_event.set()
+        self.disconnect_workers()
+        self.close_server()
+        self.reason = reason
+        self.state = "stopping"
+        return self.detach_launcher()
+
+    def detach_launcher(self):
+        launcher, self.launcher = self.launcher, None
+        return launcher
+
+    def retire(self, launcher):
+        if launcher is not None:
+            launcher.stop(timeout=5)
+        with self.lock:
+            if self.state == "stopping":
+                self.state = "stopped"
+
+    def close_server(self):
+        try:
+            self.server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.server.close()
+
+    def disconnect_workers(self):
+        for worker in list(self.workers.values()):
+            try:
+                worker.conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.workers.clear()
+
+    def stop(self):
+        self.stop_event.set()
+        with self.lock:
+            self.state = "stopping"
+            workers = list(self.workers.values())
+            launcher = self.launcher
+        for worker in workers:
+            worker.send({"type": "drain", "timeout": self.drain_timeout})
+        deadline = time.monotonic() + self.drain_timeout + 5
+        while workers and launcher is not None and launcher.running() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        with self.lock:
+            launcher = self.detach_launcher()
+            self.disconnect_workers()
+            self.close_server()
+        if launcher is not None:
+            launcher.stop()
+        with self.lock:
+            self.reason = None
+            self.state = "stopped"
+
+    def stats(self):
+        with self.lock:
+            workers = list(self.workers.values())
+            state, restarts, reason = self.state, self.restarts, self.reason
+            next_start = self.next_start
+        latencies = [worker.stats["latency"] for worker in workers if worker.stats.get("latency") is not None]
+        return {
+            "state": state,
+            "restarts": restarts,
+            "reason": reason,
+            "restart_in": max(0.0, next_start - time.monotonic()) if state == "backoff" else None,
+            "workers": len(workers),
+            "guilds": sum(worker.stats.get("guilds", 0) for worker in workers),
+            "latency": sum(latencies) / len(latencies) if latencies else None,
+            "commands_per_second": sum(worker.stats.get("commands_per_second", 0.0) for worker in workers),
+            "active_commands": sum(worker.stats.get("active_commands", 0) for worker in workers),
+        }
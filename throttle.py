@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+
+
+class BucketLimiter:
+    def __init__(self, rate, per, max_buckets=10000):
+        self.capacity = rate
+        self.fill_rate = rate / per if per else 0.0
+        self.max_buckets = max_buckets
+        self.buckets = OrderedDict()
+
+    def refill(self, key, now):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_buckets:
+                self.buckets.popitem(last=False)
+            bucket = self.buckets[key] = [float(self.capacity), now]
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.fill_rate)
+            bucket[1] = now
+        return bucket
+
+    def retry_after(self, bucket):
+        if bucket[0] >= 1:
+            return 0.0
+        return (1 - bucket[0]) / self.fill_rate if self.fill_rate else float("inf")
+
+
+def _limiter(config, max_buckets):
+    if not config or not config.get("rate"):
+        return None
+    return BucketLimiter(config["rate"], config.get("per", 1), max_buckets)
+
+
+class Throttler:
+    def __init__(self, config):
+        max_buckets = config.get("max_buckets", 10000)
+        self.user = _limiter(config.get("user"), max_buckets)
+        self.guild = _limiter(config.get("guild"), max_buckets)
+        self.command = _limiter(config.get("command"), max_buckets)
+        self.commands = {
+            name.lower(): _limiter(command_config, max_buckets)
+            for name, command_config in config.get("commands", {}).items()
+        }
+        self.notices = BucketLimiter(1, config.get("notice_per", 30), max_buckets)
+        self.throttled = 0
+
+    def check(self, user_id, guild_id, command):
+        now = time.monotonic()
+        checks = []
+        if self.user is not None:
+            checks.append((self.user, user_id))
+        if self.guild is not None and guild_id is not None:
+            checks.append((self.guild, guild_id))
+        command_limiter = self.commands.get(command, self.command)
+        if command_limiter is not None:
+            checks.append((command_limiter, (user_id, command)))
+        buckets = [(limiter, limiter.refill(key, now)) for limiter, key in checks]
+        retry_after = max((limiter.retry_after(bucket) for limiter, bucket in buckets), default=0.0)
+        if retry_after:
+            self.throttled += 1
+            return retry_after
+        for limiter, bucket in buckets:
+            bucket[0] -= 1
+        return 0.0
+
+    def should_notify(self, user_id):
+        bucket = self.notices.refill(user_id, time.monotonic())
+        if bucket[0] < 1:
+            return False
+        bucket[0] -= 1
+        return True